@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.auth.dependencies import RoleChecker
+from app.auth.hashing import get_hasher_status
+from app.database.main import get_db_pool_status
+from app.database.replicas import get_replica_status
+from app.ratelimit import default_rate_limiter
+
+from .schemas import PoolStatusModel, PasswordHasherStatusModel
+
+admin_router = APIRouter(dependencies=[Depends(default_rate_limiter)])
+admin_role_checker = Depends(RoleChecker(["admin"]))
+
+
+@admin_router.get(
+    "/db-pool", response_model=PoolStatusModel, dependencies=[admin_role_checker]
+)
+async def get_db_pool():
+    return {**get_db_pool_status(), "replicas": get_replica_status()}
+
+
+@admin_router.get(
+    "/password-hashing",
+    response_model=PasswordHasherStatusModel,
+    dependencies=[admin_role_checker],
+)
+async def get_password_hashing():
+    return get_hasher_status()
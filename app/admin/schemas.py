@@ -0,0 +1,39 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class PoolStatsModel(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    waiting: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_avg: float
+    wait_time_max: float
+
+
+class ReplicaPoolStatusModel(PoolStatsModel):
+    name: str
+    healthy: bool
+    # seconds behind the primary at the last health check
+    lag: Optional[float]
+
+
+class PoolStatusModel(PoolStatsModel):
+    replicas: List[ReplicaPoolStatusModel] = []
+
+
+class PasswordHasherStatusModel(BaseModel):
+    workers: int
+    max_queue: int
+    running: int
+    queued: int
+    completed: int
+    rejected: int
+    wait_time_avg: float
+    wait_time_max: float
+    hash_time_avg: float
@@ -0,0 +1,65 @@
+import logging
+from typing import Optional
+from redis.exceptions import RedisError
+
+from app.cache import TTLCache
+from app.config import Config
+from app.database.redis import redis_client
+from .schemas import UserPrincipal
+
+PRINCIPAL_KEY_PREFIX = "principal:"
+
+
+class PrincipalCache:
+    """Two-level cache of authenticated users keyed by user id.
+
+    Lookups hit a small per-worker LRU first and fall back to Redis, so most
+    requests resolve the current user without touching Postgres. The local
+    TTL is kept short because other workers only see an invalidation once
+    their local entry expires.
+    """
+
+    def __init__(self) -> None:
+        self.local = TTLCache(
+            maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_LOCAL_TTL
+        )
+
+    async def get(self, user_id: str) -> Optional[UserPrincipal]:
+        principal = self.local.get(user_id)
+        if principal is not None:
+            return principal
+
+        try:
+            data = await redis_client.get(PRINCIPAL_KEY_PREFIX + user_id)
+        except RedisError as e:
+            logging.error(f"principal cache read failed: {e}")
+            return None
+
+        if data is None:
+            return None
+
+        principal = UserPrincipal.model_validate_json(data)
+        self.local.set(user_id, principal)
+        return principal
+
+    async def set(self, principal: UserPrincipal) -> None:
+        user_id = str(principal.id)
+        self.local.set(user_id, principal)
+        try:
+            await redis_client.set(
+                PRINCIPAL_KEY_PREFIX + user_id,
+                principal.model_dump_json(),
+                ex=Config.PRINCIPAL_CACHE_TTL,
+            )
+        except RedisError as e:
+            logging.error(f"principal cache write failed: {e}")
+
+    async def invalidate(self, user_id: str) -> None:
+        self.local.pop(user_id)
+        try:
+            await redis_client.delete(PRINCIPAL_KEY_PREFIX + user_id)
+        except RedisError as e:
+            logging.error(f"principal cache invalidation failed: {e}")
+
+
+principal_cache = PrincipalCache()
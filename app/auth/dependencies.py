@@ -2,15 +2,18 @@ from fastapi import Request, Depends
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List
+from typing import AsyncGenerator, List
 
 from .utils import decode_token
 from app.database.redis import token_in_blocklist
 from app.database.main import get_session
+from app.database.replicas import read_session_maker
 from .service import UserService
-from app.database.models import User
+from .schemas import UserPrincipal
+from .cache import principal_cache
 from app.errors import (
     InvalidToken,
+    UserNotFound,
     AccessTokenRequired,
     RefreshTokenRequired,
     InsufficientPermission,
@@ -31,19 +34,17 @@ class TokenBearer(HTTPBearer):
 
         token_data = decode_token(token)
 
-        if not self.valid_token(token):
+        if token_data is None:
             raise InvalidToken()
 
         if await token_in_blocklist(token_data["jwtId"]):
             raise InvalidToken()
 
         self.verify_token_data(token_data)
+        # read by the middleware that records writes for read-your-writes
+        request.state.token_data = token_data
         return token_data
 
-    def valid_token(self, token: str) -> bool:
-        token_data = decode_token(token)
-        return token_data is not None
-
     def verify_token_data(self, token_data):
         raise NotImplementedError("please override this method using child classes")
 
@@ -60,22 +61,47 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
+# shared instance so FastAPI resolves the bearer once per request
+access_token_bearer = AccessTokenBearer()
+
+
 async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
+) -> UserPrincipal:
+    user_id = token_details["user"]["userId"]
+
+    principal = await principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = await user_service.get_user_by_id(user_id, session)
+    if user is None:
+        raise UserNotFound()
+
+    principal = UserPrincipal.model_validate(user, from_attributes=True)
+    await principal_cache.set(principal)
+
+    return principal
 
-    user = await user_service.get_user_by_email(user_email, session)
 
-    return user
+async def get_read_session(
+    token_details: dict = Depends(access_token_bearer),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for routes that only read: on a read replica when there is a
+    healthy one, unless this user has just written something"""
+    session_maker = read_session_maker(token_details["user"]["userId"])
+    async with session_maker() as session:
+        yield session
 
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> any:
+    def __call__(
+        self, current_user: UserPrincipal = Depends(get_current_user)
+    ) -> any:
         if not current_user.is_verified:
             raise AccountNotVerified()
         if current_user.role in self.allowed_roles:
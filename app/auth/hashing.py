@@ -0,0 +1,100 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.errors import PasswordHashingBusy
+
+
+class HasherStats:
+    def __init__(self) -> None:
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.hash_time_total = 0.0
+
+    def record(self, wait: float, elapsed: float) -> None:
+        self.completed += 1
+        self.wait_time_total += wait
+        self.wait_time_max = max(self.wait_time_max, wait)
+        self.hash_time_total += elapsed
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, started, time.perf_counter()
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool instead of the event loop.
+
+    bcrypt releases the GIL while it hashes, so the threads hash in parallel
+    and the loop keeps serving other requests. At most `workers` hashes run
+    at once and at most `max_queue` more wait for a thread; past that callers
+    get PasswordHashingBusy rather than an ever growing queue.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.stats = HasherStats()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+
+    async def run(self, fn, *args):
+        stats = self.stats
+        if stats.pending >= self.workers + self.max_queue:
+            stats.rejected += 1
+            raise PasswordHashingBusy()
+
+        stats.pending += 1
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        job = self._executor.submit(_timed, fn, *args)
+        # a cancelled caller does not stop a hash that is already running, so
+        # it stays pending until the job itself is done
+        job.add_done_callback(lambda _: self._release(loop))
+        result, started, finished = await asyncio.wrap_future(job)
+        stats.record(started - submitted, finished - started)
+        return result
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # called from the hashing thread; `pending` belongs to the loop
+        try:
+            loop.call_soon_threadsafe(self._decrement_pending)
+        except RuntimeError:
+            pass  # the loop is closed, nobody reads the stats any more
+
+    def _decrement_pending(self) -> None:
+        self.stats.pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS, max_queue=Config.PASSWORD_HASH_MAX_QUEUE
+)
+
+
+def get_hasher_status() -> dict:
+    stats = password_hasher.stats
+    return {
+        "workers": password_hasher.workers,
+        "max_queue": password_hasher.max_queue,
+        "running": min(stats.pending, password_hasher.workers),
+        "queued": max(stats.pending - password_hasher.workers, 0),
+        "completed": stats.completed,
+        "rejected": stats.rejected,
+        "wait_time_avg": (
+            stats.wait_time_total / stats.completed if stats.completed else 0.0
+        ),
+        "wait_time_max": stats.wait_time_max,
+        "hash_time_avg": (
+            stats.hash_time_total / stats.completed if stats.completed else 0.0
+        ),
+    }
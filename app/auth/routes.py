@@ -10,35 +10,51 @@ from .schemas import (
     UserBookModel,
     PasswordResetConfirmModel,
     PasswordResetRequestModel,
+    UserPrincipal,
 )
-from .service import UserService
+from .service import UserService, USER_DETAIL_LOADER_OPTIONS
 from app.database.main import get_session
+from app.database.replicas import record_write, replicas
 from .utils import (
     create_access_token,
-    verify_password,
+    verify_and_update_password,
     create_url_safe_token,
     decode_url_safe_token,
     generate_passwd_hash,
 )
 from .dependencies import (
     RefreshTokenBearer,
-    AccessTokenBearer,
+    access_token_bearer,
     get_current_user,
+    get_read_session,
     RoleChecker,
 )
 from app.database.redis import add_jwtId_to_blocklist
 from app.errors import UserAlreadyExists, InvalidCredentials, InvalidToken, UserNotFound
-from app.mail import mail, create_message
 from app.config import Config
-from app.celery import send_email
+from app.ratelimit import (
+    RateLimiter,
+    SlidingWindow,
+    TokenBucket,
+    default_rate_limiter,
+)
+from app.outbox import add_email_to_outbox
+from app.serialization import model_response
 
 
-auth_router = APIRouter()
+auth_router = APIRouter(dependencies=[Depends(default_rate_limiter)])
 user_service = UserService()
 role_checker = Depends(RoleChecker(["admin", "user"]))
+# credential and email endpoints get tighter per-client limits
+login_rate_limiter = Depends(RateLimiter(TokenBucket(capacity=5, refill_rate=0.1)))
+email_rate_limiter = Depends(RateLimiter(SlidingWindow(limit=5, window=3600)))
 
 
-@auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
+@auth_router.post(
+    "/signup",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[email_rate_limiter],
+)
 async def create_user_account(
     user_data: UserCreateModel, session: AsyncSession = Depends(get_session)
 ):
@@ -49,8 +65,6 @@ async def create_user_account(
     if user_exists:
         raise UserAlreadyExists()
     else:
-        await user_service.create_user(user_data, session)
-
         token = create_url_safe_token({"email": email})
 
         link = f"http://{Config.DOMAIN}/api/v1/auth/verify/{token}"
@@ -60,8 +74,9 @@ async def create_user_account(
         <p>Click this <a href="{link}">link</a>  to verify your email</p>
         """
         subject = "Verify Your email - Bookhub"
-        send_email
-        send_email.delay([email], subject, html_message)
+        # committed by create_user together with the new user
+        add_email_to_outbox(session, [email], subject, html_message)
+        await user_service.create_user(user_data, session)
 
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -84,6 +99,10 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
             raise UserNotFound()
 
         await user_service.update_user(user, {"is_verified": True}, session)
+        # no bearer token here, so the read-your-writes middleware cannot
+        # tell whose write this was
+        if replicas:
+            await record_write(str(user.id))
 
         return JSONResponse(
             content={"message": "Account verified successfully"},
@@ -96,7 +115,7 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     )
 
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[login_rate_limiter])
 async def login_user(
     login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
 ):
@@ -107,8 +126,16 @@ async def login_user(
 
     if user is not None:
         # validate password
-        isValid = verify_password(password, hash=user.password_hash)
+        isValid, new_hash = await verify_and_update_password(
+            password, hash=user.password_hash
+        )
         if isValid:
+            if new_hash is not None:
+                # stored with an outdated bcrypt cost; upgrade it transparently
+                await user_service.update_user(
+                    user, {"password_hash": new_hash}, session
+                )
+
             access_token = create_access_token(
                 user_data={
                     "email": user.email,
@@ -151,12 +178,20 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 
 @auth_router.get("/me", response_model=UserBookModel, dependencies=[role_checker])
-async def get_current_user(user=Depends(get_current_user)):
-    return user
+async def get_current_user_details(
+    current_user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    user = await user_service.get_user_by_id(
+        current_user.id, session, options=USER_DETAIL_LOADER_OPTIONS
+    )
+    return model_response(UserBookModel, user)
 
 
-@auth_router.post("/password-reset-request")
-async def password_reset_request(email_data: PasswordResetRequestModel):
+@auth_router.post("/password-reset-request", dependencies=[email_rate_limiter])
+async def password_reset_request(
+    email_data: PasswordResetRequestModel, session: AsyncSession = Depends(get_session)
+):
     email = email_data.email
 
     token = create_url_safe_token({"email": email})
@@ -168,7 +203,8 @@ async def password_reset_request(email_data: PasswordResetRequestModel):
     <p>Please click this <a href="{link}">link</a> to Reset Your Password</p>
     """
     subject = "Reset Your Password - BookHub"
-    send_email.delay([email], subject, html_message)
+    add_email_to_outbox(session, [email], subject, html_message)
+    await session.commit()
 
     return JSONResponse(
         content={
@@ -202,8 +238,10 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        passwd_hash = generate_passwd_hash(new_password)
+        passwd_hash = await generate_passwd_hash(new_password)
         await user_service.update_user(user, {"password_hash": passwd_hash}, session)
+        if replicas:
+            await record_write(str(user.id))
 
         return JSONResponse(
             content={"message": "Password reset Successfully"},
@@ -217,7 +255,7 @@ async def reset_account_password(
 
 
 @auth_router.get("/logout")
-async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
+async def revoke_token(token_details: dict = Depends(access_token_bearer)):
     jwtId = token_details["jwtId"]
     await add_jwtId_to_blocklist(jwtId)
 
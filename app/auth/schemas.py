@@ -27,6 +27,16 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class UserPrincipal(BaseModel):
+    """The subset of a user that authenticated requests need"""
+
+    id: uuid.UUID
+    username: str
+    email: str
+    role: str
+    is_verified: bool
+
+
 class UserBookModel(UserModel):
     books: List[schemas.Book]
     reviews: List[ReviewModel]
@@ -1,19 +1,42 @@
 from app.database.models import User
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.base import ExecutableOption
+from typing import Sequence
+from uuid import UUID
 from .schemas import UserCreateModel
 from .utils import generate_passwd_hash
+from .cache import principal_cache
+
+# loader options for endpoints that return a user with its books and reviews
+USER_DETAIL_LOADER_OPTIONS = (selectinload(User.books), selectinload(User.reviews))
 
 
 class UserService:
-    async def get_user_by_email(self, email: str, session: AsyncSession):
-        query = select(User).where(User.email == email)
+    async def get_user_by_email(
+        self,
+        email: str,
+        session: AsyncSession,
+        options: Sequence[ExecutableOption] = (),
+    ):
+        query = select(User).where(User.email == email).options(*options)
         result = await session.exec(query)
         if result:
             return result.first()
         else:
             return None
 
+    async def get_user_by_id(
+        self,
+        user_id: UUID,
+        session: AsyncSession,
+        options: Sequence[ExecutableOption] = (),
+    ):
+        query = select(User).where(User.id == user_id).options(*options)
+        result = await session.exec(query)
+        return result.first()
+
     async def user_exists(self, email, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
         return True if user is not None else False
@@ -21,11 +44,12 @@ class UserService:
     async def create_user(self, user_data: UserCreateModel, session: AsyncSession):
         user_data_dict = user_data.model_dump()
         new_user = User(**user_data_dict)
-        new_user.password_hash = generate_passwd_hash(user_data_dict["password"])
+        new_user.password_hash = await generate_passwd_hash(user_data_dict["password"])
         new_user.role = "user"
 
         session.add(new_user)
         await session.commit()
+        await principal_cache.invalidate(str(new_user.id))
 
         return new_user
 
@@ -34,5 +58,6 @@ class UserService:
             setattr(user, k, v)
 
         await session.commit()
+        await principal_cache.invalidate(str(user.id))
 
         return user
@@ -1,27 +1,59 @@
-from passlib.context import CryptContext
 from datetime import timedelta, datetime
+from functools import lru_cache
 import jwt
 import uuid
+import time
+import hashlib
 import logging
+from typing import Optional, Tuple
 from itsdangerous import URLSafeTimedSerializer
 
 from app.config import Config
+from app.cache import TTLCache
+from .hashing import password_hasher
 
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+@lru_cache(maxsize=None)
+def get_passwd_context():
+    # passlib is imported on first use, normally by the startup warm-up, to
+    # keep it off the import path of app.main. Hashes with a different cost
+    # than BCRYPT_ROUNDS are reported by verify_and_update, which is how they
+    # get rehashed on login
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=Config.BCRYPT_ROUNDS)
+
+
+def load_passwd_context() -> None:
+    # also loads the bcrypt backend, which passlib otherwise does on first hash
+    get_passwd_context().handler().get_backend()
 
 serializer = URLSafeTimedSerializer(
     secret_key=Config.JWT_SECRET, salt="email-verification"
 )
 
+# tokens whose signature has already been verified, keyed by sha256 digest
+verified_tokens = TTLCache(
+    maxsize=Config.JWT_CACHE_SIZE, ttl=Config.ACCESS_TOKEN_EXPIRY
+)
+
 
-def generate_passwd_hash(password: str) -> str:
-    hash = passwd_context.hash(password)
+async def generate_passwd_hash(password: str) -> str:
+    hash = await password_hasher.run(get_passwd_context().hash, password)
     return hash
 
 
-def verify_password(password: str, hash: str) -> bool:
-    return passwd_context.verify(password, hash)
+async def verify_password(password: str, hash: str) -> bool:
+    return await password_hasher.run(get_passwd_context().verify, password, hash)
+
+
+async def verify_and_update_password(
+    password: str, hash: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash if the stored one is outdated"""
+    return await password_hasher.run(
+        get_passwd_context().verify_and_update, password, hash
+    )
 
 
 def create_access_token(
@@ -45,15 +77,25 @@ def create_access_token(
 
 
 def decode_token(token: str) -> dict:
+    digest = hashlib.sha256(token.encode()).digest()
+    token_data = verified_tokens.get(digest)
+    if token_data is not None:
+        return token_data
+
     try:
         token_data = jwt.decode(
             jwt=token, key=Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM]
         )
-        return token_data
     except jwt.PyJWTError as error:
-        logging.exception(error)
+        # no traceback: invalid tokens are client errors and can arrive in bulk
+        logging.debug(f"invalid token: {error}")
         return None
 
+    # drop the entry when the token expires so the exp check still applies
+    ttl = token_data.get("exp", 0) - time.time()
+    verified_tokens.set(digest, token_data, ttl=ttl)
+    return token_data
+
 
 def create_url_safe_token(data: dict):
     token = serializer.dumps(data)
@@ -0,0 +1,54 @@
+"""Recompute every book's rating aggregates from its reviews.
+
+    python -m app.books.backfill_ratings
+
+Run once after the migration that adds the aggregate columns, or any time
+the aggregates are suspected to have drifted.
+"""
+
+import asyncio
+
+from sqlmodel import text
+
+from app.database.main import async_engine
+
+STATEMENTS = [
+    # block review writes so no rating is counted twice or missed meanwhile
+    "LOCK TABLE reviews IN SHARE MODE",
+    """
+    UPDATE books
+    SET review_count = coalesce(stats.review_count, 0),
+        rating_sum = coalesce(stats.rating_sum, 0),
+        average_rating = coalesce(
+            stats.rating_sum::double precision / nullif(stats.review_count, 0), 0
+        )
+    FROM books AS b
+    LEFT JOIN (
+        SELECT book_id, count(*) AS review_count, sum(rating) AS rating_sum
+        FROM reviews
+        GROUP BY book_id
+    ) AS stats ON stats.book_id = b.id
+    WHERE books.id = b.id
+      AND (books.review_count, books.rating_sum) IS DISTINCT FROM
+          (coalesce(stats.review_count, 0), coalesce(stats.rating_sum, 0))
+    """,
+    "DELETE FROM book_rating_counts",
+    """
+    INSERT INTO book_rating_counts (book_id, rating, count)
+    SELECT book_id, rating, count(*)
+    FROM reviews
+    GROUP BY book_id, rating
+    """,
+]
+
+
+async def backfill_ratings() -> None:
+    async with async_engine.begin() as conn:
+        for statement in STATEMENTS:
+            await conn.execute(text(statement))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_ratings())
+    print("rating aggregates backfilled")
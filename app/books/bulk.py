@@ -0,0 +1,102 @@
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+CSV_MEDIA_TYPES = ("text/csv",)
+
+# a record is either the parsed row or the reason it could not be parsed
+Record = Tuple[int, Union[dict, str]]
+
+LINE_TOO_LONG = "line too long"
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int
+) -> AsyncIterator[Optional[bytes]]:
+    """Split a byte stream into lines without holding more than one chunk and
+    one line. A line longer than max_length bytes is dropped as it arrives and
+    yielded as None."""
+    # start of the current line, from earlier chunks; None once it is too long
+    head: Optional[List[bytes]] = []
+    head_length = 0
+    async for chunk in chunks:
+        # only the new chunk is split; the buffered start is joined once, when
+        # its line ends
+        *lines, rest = chunk.split(b"\n")
+        for line in lines:
+            if head is None or head_length + len(line) > max_length:
+                yield None
+            else:
+                yield b"".join((*head, line)) if head else line
+            head, head_length = [], 0
+        if head is not None and rest:
+            head_length += len(rest)
+            if head_length > max_length:
+                head = None
+            else:
+                head.append(rest)
+    if head is None:
+        yield None
+    elif head:
+        yield b"".join(head)
+
+
+async def iter_ndjson_records(
+    lines: AsyncIterator[Optional[bytes]],
+) -> AsyncIterator[Record]:
+    row = 0
+    async for line in lines:
+        row += 1
+        if line is None:
+            yield row, LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "expected a JSON object"
+            continue
+        yield row, record
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[Optional[bytes]],
+) -> AsyncIterator[Record]:
+    # rows are parsed one line at a time, so quoted fields cannot contain newlines
+    header: Optional[list] = None
+    row = 0
+    async for line in lines:
+        row += 1
+        if line is None:
+            yield row, LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            values = next(csv.reader([line.decode().rstrip("\r")]))
+        except (UnicodeDecodeError, csv.Error) as e:
+            yield row, f"invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield row, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, dict(zip(header, values))
+
+
+def iter_records(
+    chunks: AsyncIterator[bytes], content_type: str, max_line_length: int
+) -> Optional[AsyncIterator[Record]]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        return iter_ndjson_records(iter_lines(chunks, max_line_length))
+    if media_type in CSV_MEDIA_TYPES:
+        return iter_csv_records(iter_lines(chunks, max_line_length))
+    return None
@@ -0,0 +1,61 @@
+import hashlib
+import logging
+from typing import Optional, Tuple
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from app.config import Config
+from app.database.models import Book
+from app.database.redis import redis_client
+
+BOOK_DETAIL_KEY_PREFIX = "book_detail:"
+
+
+def compute_book_etag(book: Book) -> str:
+    """Strong ETag over the book's version and the versions of its reviews"""
+    digest = hashlib.sha1(f"{book.id}:{book.updated_at}".encode())
+    for review in sorted(book.reviews, key=lambda review: review.id):
+        digest.update(f"|{review.id}:{review.updated_at}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
+
+
+async def get_cached_book_detail(book_id: UUID) -> Optional[Tuple[bytes, str]]:
+    try:
+        body, etag = await redis_client.hmget(
+            BOOK_DETAIL_KEY_PREFIX + str(book_id), "body", "etag"
+        )
+    except RedisError as e:
+        logging.error(f"book detail cache read failed: {e}")
+        return None
+
+    if body is None or etag is None:
+        return None
+    return body, etag.decode()
+
+
+async def cache_book_detail(book_id: UUID, body: bytes, etag: str) -> None:
+    key = BOOK_DETAIL_KEY_PREFIX + str(book_id)
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"body": body, "etag": etag})
+            pipe.expire(key, Config.BOOK_DETAIL_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logging.error(f"book detail cache write failed: {e}")
+
+
+async def invalidate_book_detail(book_id: UUID) -> None:
+    try:
+        await redis_client.delete(BOOK_DETAIL_KEY_PREFIX + str(book_id))
+    except RedisError as e:
+        logging.error(f"book detail cache invalidation failed: {e}")
@@ -1,44 +1,121 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Request, Response
 from fastapi.exceptions import HTTPException
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 
 
-from .schemas import Book, BookUpdateModel, BookCreateModel, BookDetailModel
-from .service import BookService
+from .schemas import (
+    Book,
+    BookUpdateModel,
+    BookCreateModel,
+    BookDetailModel,
+    BookPage,
+    BookListQuery,
+    BookSearchPage,
+    BookSuggestion,
+    BulkImportReport,
+)
+from .bulk import iter_records
+from .cache import (
+    cache_book_detail,
+    compute_book_etag,
+    etag_matches,
+    get_cached_book_detail,
+)
+from .service import BookService, BOOK_DETAIL_LOADER_OPTIONS
+from .suggest import suggestion_index
 from app.database.main import get_session
-from app.auth.dependencies import AccessTokenBearer, RoleChecker
+from app.auth.dependencies import access_token_bearer, get_read_session, RoleChecker
 from app.errors import BookNotFound
+from app.configs.settings import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    DEFAULT_SUGGESTIONS,
+    MAX_SUGGESTIONS,
+)
+from app.config import Config
+from app.ratelimit import RateLimiter, SlidingWindow, default_rate_limiter
+from app.export import ExportFormat, as_naive_utc, export_response
+from app.serialization import model_response
 
 
-book_router = APIRouter()
+book_router = APIRouter(dependencies=[Depends(default_rate_limiter)])
 book_service = BookService()
-access_token_bearer = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["admin", "user"]))
+admin_role_checker = Depends(RoleChecker(["admin"]))
+bulk_import_rate_limiter = Depends(RateLimiter(SlidingWindow(limit=10, window=3600)))
 
 
 # get all books
-@book_router.get("/", response_model=List[Book], dependencies=[role_checker])
+@book_router.get("/", response_model=BookPage, dependencies=[role_checker])
 async def get_all_books(
-    session: AsyncSession = Depends(get_session),
+    query: BookListQuery = Depends(),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
     _: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.get_all_books(session)
-    return books
+    books, next_cursor = await book_service.get_all_books(
+        session, query, limit, cursor
+    )
+    return model_response(BookPage, {"items": books, "next_cursor": next_cursor})
 
 
 # get all books by user_id
 @book_router.get(
-    "/user/{user_id}", response_model=List[Book], dependencies=[role_checker]
+    "/user/{user_id}", response_model=BookPage, dependencies=[role_checker]
 )
 async def get_user_books(
-    user_id: str,
-    session: AsyncSession = Depends(get_session),
+    user_id: UUID,
+    query: BookListQuery = Depends(),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    _: dict = Depends(access_token_bearer),
+):
+    books, next_cursor = await book_service.get_user_books(
+        user_id, session, query, limit, cursor
+    )
+    return model_response(BookPage, {"items": books, "next_cursor": next_cursor})
+
+
+# ranked full-text search over title, author and publisher
+@book_router.get("/search", response_model=BookSearchPage, dependencies=[role_checker])
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    _: dict = Depends(access_token_bearer),
+):
+    books, next_cursor = await book_service.search_books(q, session, limit, cursor)
+    return model_response(BookSearchPage, {"items": books, "next_cursor": next_cursor})
+
+
+# autocomplete for the search box, answered from the in-process index
+@book_router.get(
+    "/suggest", response_model=List[BookSuggestion], dependencies=[role_checker]
+)
+async def suggest_books(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=DEFAULT_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS),
     _: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.get_user_books(user_id, session)
-    return books
+    return [
+        suggestion._asdict() for suggestion in suggestion_index.suggest(prefix, limit)
+    ]
+
+
+# stream the catalog for reporting jobs
+@book_router.get("/export", dependencies=[admin_role_checker])
+async def export_books(
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: Optional[datetime] = None,
+):
+    statement = book_service.get_books_export_statement(as_naive_utc(updated_since))
+    return await export_response(statement, format, name="books")
 
 
 # get a book using book_id from DB
@@ -47,15 +124,31 @@ async def get_user_books(
 )
 async def get_book(
     book_id: UUID,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     _: dict = Depends(access_token_bearer),
-) -> dict:
-    book = await book_service.get_book(book_id, session)
-
-    if book is None:
-        raise BookNotFound()
+) -> Response:
+    cached = await get_cached_book_detail(book_id)
+    if cached is not None:
+        body, etag = cached
     else:
-        return book
+        book = await book_service.get_book(
+            book_id, session, options=BOOK_DETAIL_LOADER_OPTIONS
+        )
+
+        if book is None:
+            raise BookNotFound()
+
+        book_detail = BookDetailModel.model_validate(book, from_attributes=True)
+        body = book_detail.model_dump_json().encode()
+        etag = compute_book_etag(book)
+        await cache_book_detail(book_id, body, etag)
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # add a book in database
@@ -81,6 +174,38 @@ async def create_book(
         )
 
 
+# add books in bulk from a streamed NDJSON or CSV body
+@book_router.post(
+    "/bulk",
+    response_model=BulkImportReport,
+    dependencies=[role_checker, bulk_import_rate_limiter],
+)
+async def bulk_create_books(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    records = iter_records(
+        request.stream(),
+        request.headers.get("content-type", ""),
+        max_line_length=Config.BULK_IMPORT_MAX_LINE_LENGTH,
+    )
+    if records is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Body must be application/x-ndjson or text/csv",
+        )
+
+    user_id = token_details["user"]["userId"]
+    return await book_service.bulk_create_books(
+        records,
+        user_id,
+        session,
+        batch_size=Config.BULK_IMPORT_BATCH_SIZE,
+        max_errors=Config.BULK_IMPORT_MAX_ERRORS,
+    )
+
+
 # update a particular DB
 @book_router.patch("/{book_id}", response_model=Book, dependencies=[role_checker])
 async def update_book(
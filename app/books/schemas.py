@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
+from enum import Enum
 import uuid
 
 from app.reviews.schemas import ReviewModel
@@ -16,12 +17,69 @@ class Book(BaseModel):
     page_count: int
     language: str
     user_id: uuid.UUID
+    review_count: int
+    rating_sum: int
+    average_rating: float
     created_at: datetime
     updated_at: datetime
 
 
 class BookDetailModel(Book):
     reviews: List[ReviewModel]
+    # star rating -> number of reviews with that rating
+    rating_histogram: Dict[int, int] = Field(validation_alias="rating_counts")
+
+    @field_validator("rating_histogram", mode="before")
+    @classmethod
+    def histogram_from_rating_counts(cls, value):
+        if isinstance(value, list):
+            return {row.rating: row.count for row in value if row.count}
+        return value
+
+
+class BookSortField(str, Enum):
+    created_at = "created_at"
+    publish_date = "publish_date"
+    page_count = "page_count"
+    title = "title"
+    average_rating = "average_rating"
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+class BookListQuery(BaseModel):
+    """Filters and ordering of the book listing endpoints (query parameters)"""
+
+    language: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    # inclusive publish date range
+    publish_date_from: Optional[date] = None
+    publish_date_to: Optional[date] = None
+    sort_by: BookSortField = BookSortField.created_at
+    order: SortOrder = SortOrder.desc
+
+
+class BookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+
+
+class BookSearchResult(Book):
+    score: float
+
+
+class BookSearchPage(BaseModel):
+    items: List[BookSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class BookSuggestion(BaseModel):
+    text: str
+    kind: Literal["title", "author"]
 
 
 class BookCreateModel(BaseModel):
@@ -40,3 +98,15 @@ class BookUpdateModel(BaseModel):
     publish_date: Optional[date] = None
     page_count: Optional[int] = None
     language: Optional[str] = None
+
+
+class BulkImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class BulkImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkImportRowError]
+    errors_truncated: bool = False
@@ -1,26 +1,177 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
-from .schemas import BookCreateModel, BookUpdateModel
-from sqlmodel import select, desc
-from app.database.models import Book
-from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import insert, update, literal_column, Select, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, DOUBLE_PRECISION
+from sqlalchemy.exc import SQLAlchemyError
+from .schemas import (
+    BookCreateModel,
+    BookUpdateModel,
+    BookListQuery,
+    BookSortField,
+    SortOrder,
+)
+from sqlmodel import select, desc, tuple_, func, cast
+from sqlmodel.sql.expression import SelectOfScalar
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.sql.base import ExecutableOption
+from typing import AsyncIterator, Optional, Sequence
+from datetime import datetime, time, timedelta
+from app.configs.settings import SEARCH_CANDIDATES
+from app.database.models import Book, BookRatingCount, BOOK_SEARCH_VECTOR
+from .bulk import Record
+from .cache import invalidate_book_detail
+from .suggest import publish_book_changes
+from .utils import encode_cursor, decode_cursor, parse_publish_date
+
+# loader options for endpoints that return a book with its reviews
+BOOK_DETAIL_LOADER_OPTIONS = (
+    selectinload(Book.reviews),
+    selectinload(Book.rating_counts),
+)
+
+# type of each sort column's value inside a pagination cursor
+SORT_VALUE_TYPES = {
+    BookSortField.created_at: datetime,
+    BookSortField.publish_date: datetime,
+    BookSortField.page_count: int,
+    BookSortField.title: str,
+    BookSortField.average_rating: float,
+}
+
+# must match the configuration the search_vector column is generated with
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+SEARCH_SORT_KEY = "search"
 
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
-        result = await session.exec(statement)
-        return result.all()
+    async def _get_books_page(
+        self,
+        statement: SelectOfScalar[Book],
+        query: BookListQuery,
+        limit: int,
+        cursor: Optional[str],
+        session: AsyncSession,
+    ):
+        for column in ("language", "author", "publisher"):
+            value = getattr(query, column)
+            if value is not None:
+                statement = statement.where(getattr(Book, column) == value)
+        if query.publish_date_from is not None:
+            statement = statement.where(
+                Book.publish_date >= datetime.combine(query.publish_date_from, time())
+            )
+        if query.publish_date_to is not None:
+            statement = statement.where(
+                Book.publish_date
+                < datetime.combine(query.publish_date_to + timedelta(days=1), time())
+            )
+
+        # keyset pagination on (sort column, id): with the (filter, sort, id)
+        # index of the listing each page is an index range scan starting right
+        # after the last row of the previous page
+        sort_field = query.sort_by.value
+        sort_column = getattr(Book, sort_field)
+        sort_key = f"{sort_field}:{query.order.value}"
+        descending = query.order == SortOrder.desc
+        if cursor is not None:
+            value, book_id = decode_cursor(
+                cursor, sort_key, SORT_VALUE_TYPES[query.sort_by]
+            )
+            position = tuple_(sort_column, Book.id)
+            after = tuple_(value, book_id)
+            statement = statement.where(
+                position < after if descending else position > after
+            )
+        if descending:
+            statement = statement.order_by(desc(sort_column), desc(Book.id))
+        else:
+            statement = statement.order_by(sort_column, Book.id)
+        result = await session.exec(statement.limit(limit + 1))
+        books = result.all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor(sort_key, getattr(last, sort_field), last.id)
+
+        return books, next_cursor
 
-    async def get_user_books(self, user_id: UUID, session: AsyncSession):
-        statement = (
-            select(Book).where(Book.user_id == user_id).order_by(desc(Book.created_at))
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        query: BookListQuery,
+        limit: int,
+        cursor: Optional[str] = None,
+    ):
+        return await self._get_books_page(select(Book), query, limit, cursor, session)
+
+    async def get_user_books(
+        self,
+        user_id: UUID,
+        session: AsyncSession,
+        query: BookListQuery,
+        limit: int,
+        cursor: Optional[str] = None,
+    ):
+        statement = select(Book).where(Book.user_id == user_id)
+        return await self._get_books_page(statement, query, limit, cursor, session)
+
+    async def search_books(
+        self, query: str, session: AsyncSession, limit: int, cursor: Optional[str]
+    ):
+        # the @@ match is answered by the GIN index. Only the first
+        # SEARCH_CANDIDATES matches are read from the heap and ranked, so a
+        # common term costs the same as a rare one; its results are the best of
+        # those candidates rather than of every match, and concurrent writes
+        # can change which rows they are between two pages. Title hits rank
+        # first because of the weights in search_vector
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        candidates = (
+            select(
+                *Book.__table__.columns,
+                func.ts_rank_cd(BOOK_SEARCH_VECTOR, ts_query).label("score"),
+            )
+            .where(BOOK_SEARCH_VECTOR.op("@@")(ts_query))
+            .limit(SEARCH_CANDIDATES)
+            .subquery("candidates")
         )
-        result = await session.exec(statement)
-        return result.all()
+        book = aliased(Book, candidates)
+        score = candidates.c.score
+        statement = select(book, score).order_by(desc(score), book.id)
+        if cursor is not None:
+            # keyset on (score desc, id asc), which a row comparison cannot express
+            last_score, last_id = decode_cursor(cursor, SEARCH_SORT_KEY, float)
+            statement = statement.where(
+                or_(score < last_score, and_(score == last_score, book.id > last_id))
+            )
+        result = await session.exec(statement.limit(limit + 1))
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_score = rows[-1]
+            next_cursor = encode_cursor(SEARCH_SORT_KEY, last_score, last.id)
+
+        results = [dict(book.model_dump(), score=score) for book, score in rows]
+        return results, next_cursor
 
-    async def get_book(self, book_id: UUID, session: AsyncSession):
-        statement = select(Book).where(Book.id == book_id)
+    def get_books_export_statement(self, updated_since: Optional[datetime]) -> Select:
+        # plain column rows instead of ORM objects keep the export stream cheap
+        statement = select(Book.__table__).order_by(Book.updated_at, Book.id)
+        if updated_since is not None:
+            statement = statement.where(Book.updated_at >= updated_since)
+        return statement
+
+    async def get_book(
+        self,
+        book_id: UUID,
+        session: AsyncSession,
+        options: Sequence[ExecutableOption] = (),
+    ):
+        statement = select(Book).where(Book.id == book_id).options(*options)
         result = await session.exec(statement)
         book = result.first()
 
@@ -31,25 +182,138 @@ class BookService:
     ):
         book_data_dict = book_data.model_dump()
         new_book = Book(**book_data_dict)
-        new_book.publish_date = datetime.strptime(
-            book_data_dict["publish_date"], "%Y-%m-%d"
-        )
+        new_book.publish_date = parse_publish_date(book_data_dict["publish_date"])
         new_book.user_id = user_id
         session.add(new_book)
         await session.commit()
+        await publish_book_changes(added=[(new_book.title, new_book.author)])
         return new_book
 
+    async def bulk_create_books(
+        self,
+        records: AsyncIterator[Record],
+        user_id: str,
+        session: AsyncSession,
+        batch_size: int,
+        max_errors: int,
+    ) -> dict:
+        inserted = 0
+        failed = 0
+        errors = []
+        batch = []
+
+        async def insert_batch() -> None:
+            nonlocal inserted
+            try:
+                # one multi-row INSERT per batch, committed so that memory and
+                # transaction size stay bounded whatever the upload size
+                await session.exec(insert(Book), params=[values for _, values in batch])
+                await session.commit()
+                inserted += len(batch)
+                await publish_book_changes(
+                    added=[(values["title"], values["author"]) for _, values in batch]
+                )
+            except SQLAlchemyError as e:
+                await session.rollback()
+                for row, _ in batch:
+                    add_error(row, [f"database error: {e.__class__.__name__}"])
+            batch.clear()
+
+        def add_error(row: int, messages: list) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({"row": row, "errors": messages})
+
+        async for row, record in records:
+            if isinstance(record, str):
+                add_error(row, [record])
+                continue
+
+            try:
+                values = BookCreateModel.model_validate(record).model_dump()
+                values["publish_date"] = parse_publish_date(values["publish_date"])
+            except ValidationError as e:
+                add_error(
+                    row,
+                    [
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                        for error in e.errors()
+                    ],
+                )
+                continue
+            except ValueError as e:
+                add_error(row, [f"publish_date: {e}"])
+                continue
+
+            values["user_id"] = user_id
+            batch.append((row, values))
+            if len(batch) >= batch_size:
+                await insert_batch()
+
+        if batch:
+            await insert_batch()
+
+        return {
+            "inserted": inserted,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+        }
+
+    async def add_rating(self, book_id: UUID, rating: int, session: AsyncSession):
+        """Count a new review's rating in the book's aggregates (no commit)"""
+        await self._apply_rating(book_id, rating, 1, session)
+
+    async def remove_rating(self, book_id: UUID, rating: int, session: AsyncSession):
+        """Remove a deleted review's rating from the book's aggregates (no commit)"""
+        await self._apply_rating(book_id, rating, -1, session)
+
+    async def _apply_rating(
+        self, book_id: UUID, rating: int, delta: int, session: AsyncSession
+    ):
+        # relative updates so concurrent reviews on the same book cannot race;
+        # the right-hand sides see the values from before this update
+        new_count = Book.review_count + delta
+        await session.exec(
+            update(Book)
+            .where(Book.id == book_id)
+            .values(
+                review_count=new_count,
+                rating_sum=Book.rating_sum + delta * rating,
+                average_rating=func.coalesce(
+                    cast(Book.rating_sum + delta * rating, DOUBLE_PRECISION)
+                    / func.nullif(new_count, 0),
+                    0,
+                ),
+            )
+        )
+        await session.exec(
+            pg_insert(BookRatingCount)
+            .values(book_id=book_id, rating=rating, count=max(delta, 0))
+            .on_conflict_do_update(
+                index_elements=[BookRatingCount.book_id, BookRatingCount.rating],
+                set_={"count": BookRatingCount.count + delta},
+            )
+        )
+
     async def update_book(
         self, book_id: UUID, update_data: BookUpdateModel, session: AsyncSession
     ):
         book_to_update = await self.get_book(book_id, session)
 
         if book_to_update is not None:
+            old_terms = (book_to_update.title, book_to_update.author)
             update_data_dict = update_data.model_dump()
             for key, val in update_data_dict.items():
                 if val:
                     setattr(book_to_update, key, val)
+            book_to_update.updated_at = datetime.now()
             await session.commit()
+            await invalidate_book_detail(book_id)
+            new_terms = (book_to_update.title, book_to_update.author)
+            if new_terms != old_terms:
+                await publish_book_changes(removed=[old_terms], added=[new_terms])
             return book_to_update
         else:
             return None
@@ -60,6 +324,10 @@ class BookService:
         if book_to_delete is not None:
             await session.delete(book_to_delete)
             await session.commit()
+            await invalidate_book_detail(book_id)
+            await publish_book_changes(
+                removed=[(book_to_delete.title, book_to_delete.author)]
+            )
             return book_to_delete
         else:
             return None
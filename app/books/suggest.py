@@ -0,0 +1,306 @@
+import asyncio
+import heapq
+import json
+import logging
+import re
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import select
+
+from app.config import Config
+from app.database.main import async_session_maker
+from app.database.models import Book
+from app.database.redis import redis_client
+
+SUGGEST_CHANNEL = "book-suggest-events"
+# lets a worker skip the changes it published itself
+WORKER_ID = uuid.uuid4().hex
+
+TITLE = "title"
+AUTHOR = "author"
+
+# prefix matches looked at before ranking; bounds the cost of short prefixes
+PREFIX_SCAN_LIMIT = 100
+# changes kept beside the sorted arrays before they are rebuilt
+COMPACT_THRESHOLD = 10000
+# trigrams shared by more phrases than this cannot tell them apart
+MAX_TRIGRAM_POSTINGS = 5000
+# share of the query's trigrams a phrase must contain to count as a typo match
+MIN_TRIGRAM_SIMILARITY = 0.5
+
+_WORD = re.compile(r"\w+")
+
+# (title, author) of a book as the index sees it
+BookTerms = Tuple[str, str]
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+def trigrams(normalized: str) -> set:
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _entries(suggestion: Suggestion, normalized: str) -> List[tuple]:
+    # one entry per word so that "cook" also finds "The Python Cookbook"; the
+    # flag marks the entry that holds the whole phrase
+    words = normalized.split()
+    return [(" ".join(words[i:]), suggestion, i == 0) for i in range(len(words))]
+
+
+def _build(phrases: Iterable[Suggestion]) -> tuple:
+    entries = []
+    postings = defaultdict(set)
+    for suggestion in phrases:
+        normalized = normalize(suggestion.text)
+        entries += _entries(suggestion, normalized)
+        for gram in trigrams(normalized):
+            postings[gram].add(suggestion)
+    entries.sort(key=itemgetter(0))
+    return (
+        [suffix for suffix, _, _ in entries],
+        [(suggestion, whole) for _, suggestion, whole in entries],
+        postings,
+        {suggestion for _, suggestion, _ in entries},
+    )
+
+
+def _entries_from(keys: list, values: list, prefix: str) -> Iterator[tuple]:
+    i = bisect_left(keys, prefix)
+    while i < len(keys) and keys[i].startswith(prefix):
+        yield keys[i], values[i]
+        i += 1
+
+
+class SuggestionIndex:
+    """Per-worker autocomplete index over book titles and authors.
+
+    Word suffixes of every distinct title and author are kept in a sorted
+    array, so a prefix lookup is a binary search followed by a short scan.
+    A trigram index answers the lookups that find too little, e.g. typos.
+    Each phrase is reference counted by the number of books that use it.
+
+    The big array is never modified in place: new phrases go to a small
+    sorted delta array that lookups merge in, and phrases no book uses any
+    more are skipped by the lookups. Once COMPACT_THRESHOLD changes have
+    piled up, compact() rebuilds the arrays on a thread and swaps them in.
+    """
+
+    def __init__(self) -> None:
+        self._compaction = None
+        self._added_since_snapshot = None
+        self.replace(Counter(), *_build(()))
+
+    def replace(self, counts, keys, values, postings, phrases) -> None:
+        self._counts = counts
+        self._keys = keys
+        self._values = values
+        self._postings = postings
+        # phrases that have entries in the arrays, used or not
+        self._phrases = phrases
+        self._delta_keys = []
+        self._delta_values = []
+        self._changes = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, suggestion: Suggestion) -> None:
+        self._counts[suggestion] += 1
+        if self._counts[suggestion] > 1:
+            return
+
+        self._changes += 1
+        if self._added_since_snapshot is not None:
+            self._added_since_snapshot.append(suggestion)
+        self._index(suggestion)
+
+    def _index(self, suggestion: Suggestion) -> None:
+        if suggestion in self._phrases:
+            return
+
+        normalized = normalize(suggestion.text)
+        for suffix, _, whole in _entries(suggestion, normalized):
+            i = bisect_right(self._delta_keys, suffix)
+            self._delta_keys.insert(i, suffix)
+            self._delta_values.insert(i, (suggestion, whole))
+        for gram in trigrams(normalized):
+            self._postings[gram].add(suggestion)
+        self._phrases.add(suggestion)
+
+    def remove(self, suggestion: Suggestion) -> None:
+        # the entries stay until the next compaction; lookups skip them
+        if suggestion not in self._counts:
+            return
+        self._counts[suggestion] -= 1
+        if self._counts[suggestion] == 0:
+            del self._counts[suggestion]
+            self._changes += 1
+
+    def apply(
+        self, removed: Iterable[BookTerms] = (), added: Iterable[BookTerms] = ()
+    ) -> None:
+        for title, author in removed:
+            self.remove(Suggestion(title, TITLE))
+            self.remove(Suggestion(author, AUTHOR))
+        for title, author in added:
+            self.add(Suggestion(title, TITLE))
+            self.add(Suggestion(author, AUTHOR))
+
+    def maybe_compact(self) -> None:
+        """Start a compaction in the background if enough has changed"""
+        if self._changes >= COMPACT_THRESHOLD and self._compaction is None:
+            self._compaction = asyncio.create_task(self.compact())
+
+    async def compact(self) -> None:
+        counts = self._counts
+        changes = self._changes
+        self._added_since_snapshot = []
+        try:
+            built = await asyncio.to_thread(_build, list(counts))
+        finally:
+            self._compaction = None
+            added, self._added_since_snapshot = self._added_since_snapshot, None
+        if counts is not self._counts:
+            # the index was reloaded while this ran
+            return
+
+        # phrases added while the arrays were built go to the new delta
+        changes = self._changes - changes
+        self.replace(counts, *built)
+        for suggestion in added:
+            if suggestion in counts:
+                self._index(suggestion)
+        self._changes = changes
+
+    def _prefix_matches(self, query: str) -> Iterator[tuple]:
+        # entries of the array and of the delta that start with query, merged
+        # in key order; entries of unused phrases are skipped
+        ranges = [
+            _entries_from(self._keys, self._values, query),
+            _entries_from(self._delta_keys, self._delta_values, query),
+        ]
+        for _, (suggestion, whole) in heapq.merge(*ranges, key=itemgetter(0)):
+            if suggestion in self._counts:
+                yield suggestion, whole
+
+    def suggest(self, prefix: str, limit: int) -> List[Suggestion]:
+        query = normalize(prefix)
+        if not query:
+            return []
+
+        # phrases that start with the prefix rank above those where a later
+        # word does, then the ones used by more books
+        starts_with = {}
+        for suggestion, whole in islice(
+            self._prefix_matches(query), PREFIX_SCAN_LIMIT
+        ):
+            starts_with[suggestion] = starts_with.get(suggestion, False) or whole
+
+        results = heapq.nsmallest(
+            limit,
+            starts_with,
+            key=lambda s: (not starts_with[s], -self._counts[s], len(s.text), s),
+        )
+        if len(results) < limit:
+            results += self._similar(query, limit - len(results), set(results))
+        return results
+
+    def _similar(self, query: str, limit: int, exclude: set) -> List[Suggestion]:
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            phrases = self._postings.get(gram)
+            if phrases is not None and len(phrases) <= MAX_TRIGRAM_POSTINGS:
+                shared.update(phrases)
+
+        threshold = MIN_TRIGRAM_SIMILARITY * len(grams)
+        matches = [
+            s
+            for s, n in shared.items()
+            if n >= threshold and s not in exclude and s in self._counts
+        ]
+        return heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda s: (-shared[s], -self._counts[s], len(s.text), s),
+        )
+
+
+suggestion_index = SuggestionIndex()
+
+
+async def publish_book_changes(
+    removed: Iterable[BookTerms] = (), added: Iterable[BookTerms] = ()
+) -> None:
+    """Apply committed book changes here and broadcast them to the other workers"""
+    removed, added = list(removed), list(added)
+    suggestion_index.apply(removed, added)
+    suggestion_index.maybe_compact()
+    try:
+        await redis_client.publish(
+            SUGGEST_CHANNEL,
+            json.dumps({"origin": WORKER_ID, "removed": removed, "added": added}),
+        )
+    except RedisError as e:
+        logging.error(f"book suggestion update not published: {e}")
+
+
+async def _load_book_terms() -> Counter:
+    counts = Counter()
+    async with async_session_maker() as session:
+        result = await session.stream(
+            select(Book.title, Book.author).execution_options(
+                yield_per=Config.EXPORT_CHUNK_SIZE
+            )
+        )
+        async for title, author in result:
+            counts[Suggestion(title, TITLE)] += 1
+            counts[Suggestion(author, AUTHOR)] += 1
+    return counts
+
+
+async def sync_suggestion_index() -> None:
+    """Build `suggestion_index` and keep it current for the worker's lifetime"""
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                # subscribe before loading so no change can fall in between
+                await pubsub.subscribe(SUGGEST_CHANNEL)
+                counts = await _load_book_terms()
+                # sorting millions of entries would stall the event loop
+                built = await asyncio.to_thread(_build, list(counts))
+                suggestion_index.replace(counts, *built)
+                logging.info(f"suggestion index built: {len(counts)} phrases")
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    change = json.loads(message["data"])
+                    if change["origin"] != WORKER_ID:
+                        suggestion_index.apply(change["removed"], change["added"])
+                        suggestion_index.maybe_compact()
+        except (RedisError, SQLAlchemyError) as e:
+            logging.error(f"book suggestion index out of sync: {e}")
+        except Exception:
+            # e.g. a malformed message; the index is reloaded on resubscribe
+            logging.exception("book suggestion sync failed, resubscribing")
+
+        await asyncio.sleep(1)
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import date, datetime
+from uuid import UUID
+
+from app.errors import InvalidCursor
+
+
+def encode_cursor(sort_key: str, value, book_id: UUID) -> str:
+    """Opaque position after the row with this sort value and id.
+
+    sort_key names the ordering the cursor belongs to, so that a cursor is not
+    reused with a different sort.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, value, str(book_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, value_type: type) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_key, value, book_id = json.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+        if cursor_sort_key != sort_key:
+            raise InvalidCursor()
+        if value_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, value_type):
+            raise InvalidCursor()
+        return value, UUID(book_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def parse_publish_date(value: str) -> datetime:
+    # date.fromisoformat is several times faster than strptime("%Y-%m-%d")
+    return datetime.combine(date.fromisoformat(value), datetime.min.time())
@@ -1,15 +1,71 @@
+import logging
+import smtplib
+
 from celery import Celery
-from app.mail import mail, create_message
-from asgiref.sync import async_to_sync
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    worker_process_shutdown,
+)
+from app.mail import create_email_message, create_smtp_sender
+from app.metrics import task_publish_started, task_published
 
 celery_app = Celery()
 
 celery_app.config_from_object("app.config")
 
+# enqueue latency, as seen by the processes that publish tasks
+before_task_publish.connect(task_publish_started)
+after_task_publish.connect(task_published)
+
+# one persistent SMTP connection per worker process, opened on first use
+smtp_sender = create_smtp_sender()
+
+
+@worker_process_shutdown.connect
+def close_smtp_connection(**kwargs):
+    smtp_sender.close()
+
 
 @celery_app.task()
 def send_email(recipients: list[str], subject: str, body: str):
-    message = create_message(recipients=recipients, subject=subject, body=body)
+    message = create_email_message(recipients=recipients, subject=subject, body=body)
+
+    smtp_sender.send(message)
+    logging.info("Email sent")
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    # 5xx replies fail the same way on every retry; 4xx ones (mailbox busy,
+    # greylisting, rate limits) are worth retrying
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # raised when every recipient was refused, each with its own reply
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=30)
+def send_email_batch(self, emails: list[dict]):
+    """Send many emails over the worker's SMTP connection.
+
+    Each email is a dict with recipients, subject and body. Emails that fail
+    temporarily are retried together later; the others are not sent again.
+    """
+    sent = 0
+    failed = []
+    for email in emails:
+        message = create_email_message(
+            recipients=email["recipients"], subject=email["subject"], body=email["body"]
+        )
+        try:
+            smtp_sender.send(message)
+            sent += 1
+        except (smtplib.SMTPException, OSError) as e:
+            logging.error(f"email to {email['recipients']} failed: {e}")
+            if not is_permanent_failure(e):
+                smtp_sender.close()
+                failed.append(email)
 
-    async_to_sync(mail.send_message)(message)
-    print("Email sent")
+    logging.info(f"{sent} emails sent")
+    if failed:
+        raise self.retry(args=(failed,))
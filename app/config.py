@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional
 import os
 
 DOTENV = os.path.join(os.path.dirname(__file__), ".env")
@@ -6,10 +7,61 @@ DOTENV = os.path.join(os.path.dirname(__file__), ".env")
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # read-only routes are spread over these; a JSON list in the environment,
+    # e.g. DATABASE_REPLICA_URLS='["postgresql+asyncpg://u:p@replica1/bookhub"]'
+    DATABASE_REPLICA_URLS: List[str] = []
+    # seconds a user's reads go to the primary after they changed something
+    READ_YOUR_WRITES_WINDOW: float = 5
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 2
+    # replicas lagging further behind (seconds) are taken out of rotation
+    REPLICA_MAX_LAG: float = 10
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+    # connections all API workers together may open to each database server,
+    # primary or replica (python -m app.server); keep it below Postgres'
+    # max_connections minus what Celery, migrations and admin sessions need
+    DB_MAX_CONNECTIONS: Optional[int] = None
+    # connections opened at startup; at most DB_POOL_SIZE of them stay open
+    DB_WARMUP_CONNECTIONS: int = 5
+    SQL_SLOW_QUERY_THRESHOLD_MS: float = 200
+    # same statement this many times in one request is reported as an N+1
+    SQL_REPEATED_QUERY_THRESHOLD: int = 10
+    SQL_SERVER_TIMING: bool = True
+    # render list responses straight to JSON bytes, see app/serialization.py
+    FAST_SERIALIZATION: bool = False
+    # python -m app.server; WEB_WORKERS defaults to the number of usable CPUs
+    WEB_WORKERS: Optional[int] = None
+    WEB_KEEPALIVE: int = 5
+    WEB_BACKLOG: int = 2048
+    # seconds in-flight requests get to finish after SIGTERM
+    WEB_GRACEFUL_TIMEOUT: int = 30
     JWT_SECRET: str
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRY: int
+    JWT_CACHE_SIZE: int = 10000
+    # password hashes are upgraded to a new cost on the user's next login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_WARMUP_CONNECTIONS: int = 5
+    # only meant to be turned off for load tests
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT: int = 100
+    RATE_LIMIT_WINDOW: int = 60
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_MAX_ERRORS: int = 1000
+    # bytes; longer rows are reported as errors without being buffered
+    BULK_IMPORT_MAX_LINE_LENGTH: int = 65536
+    EXPORT_CHUNK_SIZE: int = 1000
+    BOOK_DETAIL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 10
+    PRINCIPAL_CACHE_SIZE: int = 10000
     MAIL_USERNAME: str
     MAIL_FROM_EMAIL: str
     MAIL_FROM_NAME: str
@@ -20,7 +72,15 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT: int = 30
+    # per email worker process; 0 disables the limit
+    MAIL_SEND_RATE: float = 10
+    MAIL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    # reconnect instead of reusing a connection idle for longer than this
+    MAIL_CONNECTION_IDLE_TIMEOUT: int = 60
     DOMAIN: str
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
 
     model_config = SettingsConfigDict(env_file=DOTENV, extra="ignore")
 
@@ -1,3 +1,9 @@
 VERSION = "v1"
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# matches of a search that are ranked; the rest are never read
+SEARCH_CANDIDATES = 1000
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 25
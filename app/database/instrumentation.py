@@ -0,0 +1,82 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import Config
+
+
+class QueryStats:
+    """Queries run on behalf of one request"""
+
+    def __init__(self, scope: dict) -> None:
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def route(self) -> str:
+        # resolved lazily: the route is only known once the router has run
+        route = self.scope.get("route")
+        return route.path if route is not None else self.scope.get("path", "-")
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        # parameters are bound separately, so the statement text is its shape
+        self.shapes[statement] += 1
+        if self.shapes[statement] == Config.SQL_REPEATED_QUERY_THRESHOLD:
+            logging.warning(
+                f"possible N+1: statement ran {Config.SQL_REPEATED_QUERY_THRESHOLD}"
+                f" times in {self.scope.get('method')} {self.route}: "
+                f"{_shorten(statement)}"
+            )
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _shorten(statement: str, limit: int = 500) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= Config.SQL_SLOW_QUERY_THRESHOLD_MS:
+        route = stats.route if stats is not None else "-"
+        logging.warning(
+            f"slow query ({elapsed * 1000:.1f} ms) in {route}: {_shorten(statement)}"
+        )
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute the engine's queries to the current request and log slow ones"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
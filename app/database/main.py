@@ -1,29 +1,79 @@
-from sqlmodel import create_engine, text
+import asyncio
+from sqlmodel import create_engine
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, Optional
 from app.config import Config
+from app.metrics import DB_POOL_CHECKED_OUT, DB_POOL_SIZE
+from .instrumentation import instrument_engine
+from .pool import InstrumentedAsyncQueuePool, get_pool_status
 
-async_engine = AsyncEngine(
-    create_engine(
-        url=Config.DATABASE_URL,
-        echo=True,
+def create_db_engine(url: str, pool_name: str) -> AsyncEngine:
+    """Engine with the configured pool, whose pool and queries are reported
+    under pool_name"""
+    engine = AsyncEngine(
+        create_engine(
+            url=url,
+            echo=Config.DB_ECHO,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+            pool_pre_ping=Config.DB_POOL_PRE_PING,
+        )
     )
+    engine.sync_engine.pool.name = pool_name
+    DB_POOL_SIZE.labels(pool_name).set(Config.DB_POOL_SIZE)
+    checked_out = DB_POOL_CHECKED_OUT.labels(pool_name)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _count_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+async_engine = create_db_engine(Config.DATABASE_URL, "primary")
+
+async_session_maker = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
-async def init_db():
-    async with async_engine.begin() as conn:
-        statement = text("SELECT 'hello';")
-        result = await conn.execute(statement)
-        print(result.all())
+async def init_db(
+    connections: int,
+    warm_up: Optional[Callable[[AsyncSession], Awaitable[None]]] = None,
+) -> None:
+    """Open pooled connections ahead of the first requests.
 
+    warm_up runs on each of them, e.g. to prepare the hot statements, which
+    asyncpg caches per connection.
+    """
+    # the sessions are held at the same time so that each one checks out its
+    # own connection; connections past the pool size would be closed on return
+    sessions = [
+        async_session_maker() for _ in range(min(connections, Config.DB_POOL_SIZE))
+    ]
+    try:
+        await asyncio.gather(*(session.connection() for session in sessions))
+        if warm_up is not None:
+            await asyncio.gather(*(warm_up(session) for session in sessions))
+    finally:
+        await asyncio.gather(*(session.close() for session in sessions))
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
 
-    async with Session() as session:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_maker() as session:
         yield session
+
+
+def get_db_pool_status() -> dict:
+    return get_pool_status(async_engine.sync_engine.pool)
@@ -1,4 +1,15 @@
-from sqlmodel import SQLModel, Field, Column, Relationship, Integer, Text
+from sqlmodel import (
+    SQLModel,
+    Field,
+    Column,
+    Relationship,
+    Integer,
+    BigInteger,
+    Text,
+    Index,
+    ForeignKey,
+)
+from sqlalchemy import literal_column
 import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime
 import uuid
@@ -11,7 +22,7 @@ class User(SQLModel, table=True):
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
     username: str
-    email: str
+    email: str = Field(index=True)
     first_name: str
     last_name: str
     is_verified: bool = Field(default=False)
@@ -21,19 +32,45 @@ class User(SQLModel, table=True):
     )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    # collections are never loaded implicitly; queries that need them pass
+    # loader options explicitly (see USER_DETAIL_LOADER_OPTIONS)
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
         return f"<User {self.username}>"
 
 
+# filters and sort keys of the book listing endpoints; each (filter, sort)
+# pair gets a keyset pagination index on (filter, sort, id)
+BOOK_LIST_FILTERS = (None, "user_id", "language", "author", "publisher")
+BOOK_LIST_SORTS = (
+    "created_at",
+    "publish_date",
+    "page_count",
+    "title",
+    "average_rating",
+)
+
+
+def _book_listing_indexes():
+    for filter_column in BOOK_LIST_FILTERS:
+        for sort_column in BOOK_LIST_SORTS:
+            columns = [c for c in (filter_column, sort_column, "id") if c]
+            yield Index(f"ix_books_{'_'.join(columns)}", *columns)
+
+
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        *_book_listing_indexes(),
+        # incremental exports
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+    )
     id: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -44,10 +81,31 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id")
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    # rating aggregates, maintained by ReviewService in the review's transaction
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0"),
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0"),
+    )
+    average_rating: float = Field(
+        default=0,
+        sa_column=Column(
+            pg.DOUBLE_PRECISION, nullable=False, default=0, server_default="0"
+        ),
+    )
+    # a keyset pagination sort key, so it cannot be NULL
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    rating_counts: List["BookRatingCount"] = Relationship(
+        sa_relationship_kwargs={"lazy": "raise", "passive_deletes": True}
     )
     user: Optional[User] = Relationship(back_populates="books")
 
@@ -55,17 +113,60 @@ class Book(SQLModel, table=True):
         return f"<Book {self.title}>"
 
 
+# Postgres generates books.search_vector from title, author and publisher (see
+# the add_book_search_vector migration). It is deliberately left out of the
+# mapping so books are never loaded or written with it; queries reference it
+# through this expression instead.
+BOOK_SEARCH_VECTOR = literal_column("books.search_vector", type_=pg.TSVECTOR)
+
+
+class BookRatingCount(SQLModel, table=True):
+    """One row per (book, star rating): the book's rating histogram"""
+
+    __tablename__ = "book_rating_counts"
+    book_id: uuid.UUID = Field(
+        sa_column=Column(
+            pg.UUID, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    rating: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # incremental exports
+        Index("ix_reviews_updated_at_id", "updated_at", "id"),
+    )
     id: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=True))
     review_text: str
     rating: int = Field(lt=5)
-    book_id: uuid.UUID = Field(foreign_key="books.id")
-    user_id: uuid.UUID = Field(foreign_key="users.id")
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    book_id: uuid.UUID = Field(foreign_key="books.id", index=True)
+    user_id: uuid.UUID = Field(foreign_key="users.id", index=True)
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, index=True)
+    )
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     user: Optional[User] = Relationship(back_populates="reviews")
     book: Optional[Book] = Relationship(back_populates="reviews")
 
     def __repr__(self):
         return f"<Review for book: {self.book_id} by user: {self.user_id}>"
+
+
+class EmailOutbox(SQLModel, table=True):
+    """Emails waiting to be handed to Celery.
+
+    Rows are written in the same transaction as the change that triggers the
+    email and deleted by the outbox dispatcher once they have been enqueued.
+    """
+
+    __tablename__ = "email_outbox"
+    id: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True)
+    )
+    recipients: List[str] = Field(sa_column=Column(pg.ARRAY(Text), nullable=False))
+    subject: str
+    body: str = Field(sa_column=Column(Text, nullable=False))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
@@ -0,0 +1,72 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT, DB_POOL_WAITING
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, elapsed: float) -> None:
+        self.checkouts += 1
+        self.wait_time_total += elapsed
+        self.wait_time_max = max(self.wait_time_max, elapsed)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait to get a connection"""
+
+    # metrics label, set by create_db_engine
+    name = "primary"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        self.stats.waiting += 1
+        DB_POOL_WAITING.labels(self.name).inc()
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            self.stats.waiting -= 1
+            DB_POOL_WAITING.labels(self.name).dec()
+        elapsed = time.perf_counter() - start
+        self.stats.record_wait(elapsed)
+        DB_POOL_WAIT.labels(self.name).observe(elapsed)
+        return conn
+
+    def recreate(self):
+        # keep counters across pool recreation (e.g. after a disconnect)
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        new_pool.name = self.name
+        return new_pool
+
+
+def get_pool_status(pool: InstrumentedAsyncQueuePool) -> dict:
+    stats = pool.stats
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": stats.waiting,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_time_total": stats.wait_time_total,
+        "wait_time_avg": (
+            stats.wait_time_total / stats.checkouts if stats.checkouts else 0.0
+        ),
+        "wait_time_max": stats.wait_time_max,
+    }
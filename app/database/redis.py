@@ -1,14 +1,167 @@
+import asyncio
+import logging
+import time
 from redis import asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
 from app.config import Config
+from app.metrics import REDIS_COMMAND_DURATION
 
 
-redis_client = aioredis.from_url(Config.REDIS_URL)
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.labels("PIPELINE").observe(
+                time.perf_counter() - start
+            )
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client that records the round trip time of every command"""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+redis_client = InstrumentedRedis.from_url(Config.REDIS_URL)
+
+
+async def init_redis(connections: int) -> None:
+    # commands in flight at the same time each take their own pooled connection
+    await asyncio.gather(*(redis_client.ping() for _ in range(connections)))
+
+BLOCKLIST_KEY_PREFIX = "blocklist:"
+BLOCKLIST_CHANNEL = "blocklist-events"
+# jwtIds revoked before keys were namespaced; these expire on their own within
+# ACCESS_TOKEN_EXPIRY seconds of the upgrade
+LEGACY_BLOCKLIST_PATTERN = "????????-????-????-????-????????????"
+
+
+class RevokedTokenSet:
+    """Per-worker copy of the revoked jwtIds that have not expired yet.
+
+    It is only authoritative while `synced` is set, i.e. while this worker is
+    subscribed to BLOCKLIST_CHANNEL and has loaded the existing blocklist.
+    `unpublished` holds the jwtIds this worker revoked while publishing to the
+    channel failed; they are published again on the next resync.
+    """
+
+    def __init__(self) -> None:
+        self.synced = False
+        self.unpublished: list[str] = []
+        self._expiry: dict[str, float] = {}
+        self._next_prune = 0.0
+
+    def add(self, jwt_id: str, ttl: float) -> None:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._expiry = {k: v for k, v in self._expiry.items() if v > now}
+            self._next_prune = now + 60
+        self._expiry[jwt_id] = now + ttl
+
+    def __contains__(self, jwt_id: str) -> bool:
+        expires_at = self._expiry.get(jwt_id)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+revoked_tokens = RevokedTokenSet()
 
 
 async def add_jwtId_to_blocklist(jwtId: str) -> None:
-    await redis_client.set(name=jwtId, value="", ex=Config.ACCESS_TOKEN_EXPIRY)
+    await redis_client.set(
+        name=BLOCKLIST_KEY_PREFIX + jwtId, value="", ex=Config.ACCESS_TOKEN_EXPIRY
+    )
+    revoked_tokens.add(jwtId, Config.ACCESS_TOKEN_EXPIRY)
+    try:
+        await redis_client.publish(BLOCKLIST_CHANNEL, jwtId)
+    except RedisError as e:
+        # the token is already revoked in Redis; the other workers just have
+        # not heard about it, so fall back to EXISTS until it is republished
+        logging.error(f"blocklist publish failed, resyncing: {e}")
+        revoked_tokens.unpublished.append(jwtId)
+        revoked_tokens.synced = False
 
 
 async def token_in_blocklist(jwtId: str) -> bool:
-    jwt_id = await redis_client.get(jwtId)
-    return jwt_id is not None
+    if revoked_tokens.synced:
+        return jwtId in revoked_tokens
+
+    # not subscribed (startup or lost connection): ask Redis directly
+    return await redis_client.exists(BLOCKLIST_KEY_PREFIX + jwtId) > 0
+
+
+async def _load_blocklist() -> None:
+    for pattern, prefix_len in (
+        (BLOCKLIST_KEY_PREFIX + "*", len(BLOCKLIST_KEY_PREFIX)),
+        (LEGACY_BLOCKLIST_PATTERN, 0),
+    ):
+        keys = [key async for key in redis_client.scan_iter(pattern, count=1000)]
+        if not keys:
+            continue
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            ttls = await pipe.execute()
+
+        for key, ttl in zip(keys, ttls):
+            if ttl > 0:
+                revoked_tokens.add(key.decode()[prefix_len:], ttl)
+
+
+async def _republish_revoked() -> None:
+    while revoked_tokens.unpublished:
+        jwt_id = revoked_tokens.unpublished[0]
+        # no need to announce ids that have expired in the meantime
+        if jwt_id in revoked_tokens:
+            await redis_client.publish(BLOCKLIST_CHANNEL, jwt_id)
+        revoked_tokens.unpublished.pop(0)
+
+
+async def sync_revoked_tokens() -> None:
+    """Keep `revoked_tokens` current; runs for the lifetime of the worker"""
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                # subscribe before loading so no revocation can fall in between
+                await pubsub.subscribe(BLOCKLIST_CHANNEL)
+                await _republish_revoked()
+                await _load_blocklist()
+                revoked_tokens.synced = True
+
+                # a failed publish clears `synced` to start a resync
+                while revoked_tokens.synced:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None and message["type"] == "message":
+                        revoked_tokens.add(
+                            message["data"].decode(), Config.ACCESS_TOKEN_EXPIRY
+                        )
+        except RedisError as e:
+            logging.error(f"blocklist subscription lost: {e}")
+        except Exception:
+            # e.g. a malformed message; without the loop this worker would
+            # stop seeing revocations (CancelledError is not an Exception)
+            logging.exception("blocklist sync failed, resubscribing")
+        finally:
+            revoked_tokens.synced = False
+
+        await asyncio.sleep(1)
@@ -0,0 +1,214 @@
+"""Routing of read-only requests to Postgres read replicas.
+
+Routes that only read take their session from get_read_session
+(app/auth/dependencies.py), which picks a replica from DATABASE_REPLICA_URLS
+round-robin; everything else keeps using the primary. Two things send reads
+back to the primary:
+
+- a replica that cannot be reached or lags more than REPLICA_MAX_LAG seconds
+  is out of rotation until a health check finds it caught up again, and with
+  no replica in rotation all reads go to the primary;
+- after a user changes something, their reads go to the primary for
+  READ_YOUR_WRITES_WINDOW seconds, so they see their own writes. Writes are
+  announced to every worker over Redis; while a worker is not subscribed it
+  cannot know about other workers' writes and sends all reads to the primary.
+
+Any two Postgres servers with the schema work for trying this out locally:
+point DATABASE_URL at one and DATABASE_REPLICA_URLS at the other. Without
+streaming replication the "replica" only has what was written to it directly,
+which makes it easy to see which server answered.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache import TTLCache
+from app.config import Config
+from .main import async_session_maker, create_db_engine
+from .pool import get_pool_status
+from .redis import redis_client
+
+RECENT_WRITES_CHANNEL = "recent-write-events"
+RECENT_WRITERS_SIZE = 100000
+
+# seconds of WAL the replica has received but not replayed yet. A replica
+# that has replayed everything is current even when the primary has been
+# idle for a while; a server that is not in recovery has no lag at all
+REPLICATION_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, url: str, name: str) -> None:
+        self.name = name
+        self.engine = create_db_engine(url, name)
+        self.session_maker = sessionmaker(
+            bind=self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        # out of rotation until the first health check passes
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+    async def _replication_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            return float(await conn.scalar(REPLICATION_LAG))
+
+    async def check(self) -> None:
+        try:
+            # connecting is under the timeout too: a replica that drops
+            # packets would otherwise stay in rotation until asyncpg gives up
+            self.lag = await asyncio.wait_for(
+                self._replication_lag(), timeout=Config.REPLICA_HEALTH_CHECK_INTERVAL
+            )
+        except (SQLAlchemyError, OSError) as e:
+            self._set_healthy(False, f"unreachable: {e!r}")
+            return
+
+        if self.lag > Config.REPLICA_MAX_LAG:
+            self._set_healthy(False, f"{self.lag:.1f}s behind")
+        else:
+            self._set_healthy(True, f"{self.lag:.1f}s behind")
+
+    def _set_healthy(self, healthy: bool, reason: str) -> None:
+        if healthy != self.healthy:
+            log = logging.info if healthy else logging.warning
+            state = "back in rotation" if healthy else "out of rotation"
+            url = self.engine.url.render_as_string(hide_password=True)
+            log(f"read replica {self.name} ({url}) {state} ({reason})")
+        self.healthy = healthy
+
+
+class ReplicaSet:
+    def __init__(self, urls: List[str]) -> None:
+        self.replicas = [Replica(url, f"replica-{i}") for i, url in enumerate(urls)]
+        self._turn = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(replica.engine.dispose() for replica in self.replicas))
+
+
+replicas = ReplicaSet(Config.DATABASE_REPLICA_URLS)
+
+
+def get_replica_status() -> list:
+    return [
+        {
+            "name": replica.name,
+            "healthy": replica.healthy,
+            "lag": replica.lag,
+            **get_pool_status(replica.engine.sync_engine.pool),
+        }
+        for replica in replicas.replicas
+    ]
+
+
+class RecentWriters:
+    """Per-worker set of the users who wrote within READ_YOUR_WRITES_WINDOW.
+
+    It is only complete once this worker has been subscribed to
+    RECENT_WRITES_CHANNEL for a whole window; writes announced before that
+    were missed.
+    """
+
+    def __init__(self) -> None:
+        self.subscribed_at: Optional[float] = None
+        self._users = TTLCache(
+            maxsize=RECENT_WRITERS_SIZE, ttl=Config.READ_YOUR_WRITES_WINDOW
+        )
+
+    @property
+    def synced(self) -> bool:
+        return (
+            self.subscribed_at is not None
+            and time.monotonic() - self.subscribed_at >= Config.READ_YOUR_WRITES_WINDOW
+        )
+
+    def add(self, user_id: str) -> None:
+        self._users.set(user_id, True)
+
+    def __contains__(self, user_id: str) -> bool:
+        return self._users.get(user_id) is not None
+
+
+recent_writers = RecentWriters()
+
+
+async def record_write(user_id: str) -> None:
+    recent_writers.add(user_id)
+    try:
+        await redis_client.publish(RECENT_WRITES_CHANNEL, user_id)
+    except RedisError as e:
+        # the other workers lose their subscription too and use the primary
+        logging.error(f"could not announce write by {user_id}: {e}")
+
+
+def read_session_maker(user_id: str) -> sessionmaker:
+    """Session factory for a read-only request by user_id"""
+    if not replicas or not recent_writers.synced or user_id in recent_writers:
+        return async_session_maker
+
+    replica = replicas.choose()
+    return replica.session_maker if replica is not None else async_session_maker
+
+
+async def monitor_replicas() -> None:
+    """Health-check the replicas; runs for the lifetime of the worker"""
+    while True:
+        try:
+            await replicas.check()
+        except Exception:
+            # a bug here must not freeze the replicas' health as it is
+            logging.exception("read replica health check failed")
+        await asyncio.sleep(Config.REPLICA_HEALTH_CHECK_INTERVAL)
+
+
+async def sync_recent_writers() -> None:
+    """Keep `recent_writers` current; runs for the lifetime of the worker"""
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(RECENT_WRITES_CHANNEL)
+                recent_writers.subscribed_at = time.monotonic()
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        recent_writers.add(message["data"].decode())
+        except RedisError as e:
+            logging.error(f"recent writes subscription lost: {e}")
+        except Exception:
+            # e.g. a malformed message; reads use the primary until resubscribed
+            logging.exception("recent writes sync failed, resubscribing")
+        finally:
+            recent_writers.subscribed_at = None
+
+        await asyncio.sleep(1)
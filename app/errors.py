@@ -65,6 +65,26 @@ class UserNotFound(BookHubException):
     pass
 
 
+class InvalidCursor(BookHubException):
+    """User has provided a malformed pagination cursor"""
+
+    pass
+
+
+class RateLimitExceeded(BookHubException):
+    """User has sent too many requests to a rate limited route"""
+
+    def __init__(self, headers: dict) -> None:
+        super().__init__()
+        self.headers = headers
+
+
+class PasswordHashingBusy(BookHubException):
+    """Too many password hashes are already running or queued on this worker"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
 
@@ -188,6 +208,30 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid",
+                "resolution": "Use the next_cursor returned by the previous page",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PasswordHashingBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Too many sign-ins in progress",
+                "resolution": "Please try again in a few seconds",
+                "error_code": "password_hashing_busy",
+            },
+        ),
+    )
+
     app.add_exception_handler(
         AccountNotVerified,
         create_exception_handler(
@@ -200,6 +244,17 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    @app.exception_handler(RateLimitExceeded)
+    async def rate_limit_exceeded(request, exc: RateLimitExceeded):
+        return JSONResponse(
+            content={
+                "message": "Too many requests, try again later.",
+                "error_code": "rate_limited",
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers=exc.headers,
+        )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
         return JSONResponse(
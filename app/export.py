@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import AsyncIterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.background import BackgroundTask
+
+from app.config import Config
+from app.database.main import async_session_maker
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(row._asdict(), default=_json_default) + "\n" for row in rows
+    ).encode()
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+    return buffer.getvalue().encode()
+
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """updated_since as the naive UTC timestamps the tables store"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _stream_rows(
+    session: AsyncSession,
+    columns: List[str],
+    partitions: AsyncIterator[list],
+    first: Optional[list],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    try:
+        if export_format == ExportFormat.csv:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue().encode()
+            encode = _encode_csv
+        else:
+            encode = _encode_ndjson
+
+        if first is None:
+            return
+        yield encode(first)
+        async for rows in partitions:
+            yield encode(rows)
+    finally:
+        await session.close()
+
+
+async def export_response(
+    statement: Select, export_format: ExportFormat, name: str
+) -> StreamingResponse:
+    """Stream the rows of statement as a file download.
+
+    The query runs and its first chunk is fetched before the response is
+    returned, so a failing query is an error response instead of a 200 with a
+    truncated body; later chunks are fetched while the client reads.
+    """
+    # the request's session is closed before a streaming body is sent, so the
+    # export owns its session for as long as the client keeps reading
+    session = async_session_maker()
+    try:
+        result = await session.stream(
+            statement.execution_options(yield_per=Config.EXPORT_CHUNK_SIZE)
+        )
+        partitions = result.partitions()
+        first = await anext(partitions, None)
+    except BaseException:
+        await session.close()
+        raise
+
+    filename = f"{name}.{export_format.value}"
+    return StreamingResponse(
+        _stream_rows(session, list(result.keys()), partitions, first, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        # closes the session when the body never started streaming; closing
+        # twice is harmless
+        background=BackgroundTask(session.close),
+    )
@@ -1,31 +1,137 @@
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
 from app.config import Config
-from pathlib import Path
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Optional
+import smtplib
+import ssl
+import time
 
-BASE_DIR = Path(__file__).resolve().parent
 
+def create_email_message(recipients: list[str], subject: str, body: str):
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM_EMAIL))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message.set_content(body, subtype="html")
 
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM_EMAIL,
-    MAIL_PORT=Config.MAIL_PORT,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=Config.MAIL_STARTTLS,
-    MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
-    USE_CREDENTIALS=Config.USE_CREDENTIALS,
-    VALIDATE_CERTS=Config.VALIDATE_CERTS,
-    # TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
-)
+    return message
 
 
-mail = FastMail(config=mail_config)
+class SMTPSender:
+    """Sends mail over one persistent SMTP connection.
 
-def create_message(recipients: list[str], subject: str, body: str):
+    Meant for the Celery email worker: each worker process keeps a sender, so
+    consecutive messages reuse the connection and its TLS session instead of
+    paying for a new handshake per email. The connection is replaced after
+    `max_messages` messages or when it has been idle for `idle_timeout`
+    seconds, and messages are paced to at most `rate` per second.
+    """
 
-    message = MessageSchema(
-        recipients=recipients, subject=subject, body=body, subtype=MessageType.html
-    )
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        starttls: bool = True,
+        ssl_tls: bool = False,
+        use_credentials: bool = True,
+        validate_certs: bool = True,
+        timeout: int = 30,
+        rate: float = 0,
+        max_messages: int = 100,
+        idle_timeout: int = 60,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.ssl_tls = ssl_tls
+        self.use_credentials = use_credentials
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.rate = rate
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
 
-    return message
+        self._connection: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+        self._last_used = 0.0
+        self._next_send = 0.0
+
+    def _tls_context(self) -> ssl.SSLContext:
+        context = ssl.create_default_context()
+        if not self.validate_certs:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.ssl_tls:
+            connection = smtplib.SMTP_SSL(
+                self.host, self.port, timeout=self.timeout, context=self._tls_context()
+            )
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                connection.starttls(context=self._tls_context())
+        if self.use_credentials:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _get_connection(self) -> smtplib.SMTP:
+        if self._connection is not None and (
+            self._sent_on_connection >= self.max_messages
+            or time.monotonic() - self._last_used > self.idle_timeout
+        ):
+            self.close()
+        if self._connection is None:
+            self._connection = self._connect()
+            self._sent_on_connection = 0
+        return self._connection
+
+    def _throttle(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+        self._next_send = max(now, self._next_send) + 1 / self.rate
+
+    def send(self, message: EmailMessage) -> None:
+        self._throttle()
+        try:
+            self._get_connection().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # the server dropped a pooled connection; retry once on a new one
+            self.close()
+            self._get_connection().send_message(message)
+        self._sent_on_connection += 1
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except (smtplib.SMTPException, OSError):
+            self._connection.close()
+        self._connection = None
+
+
+def create_smtp_sender() -> SMTPSender:
+    return SMTPSender(
+        host=Config.MAIL_SERVER,
+        port=Config.MAIL_PORT,
+        username=Config.MAIL_USERNAME,
+        password=Config.MAIL_PASSWORD,
+        starttls=Config.MAIL_STARTTLS,
+        ssl_tls=Config.MAIL_SSL_TLS,
+        use_credentials=Config.USE_CREDENTIALS,
+        validate_certs=Config.VALIDATE_CERTS,
+        timeout=Config.MAIL_TIMEOUT,
+        rate=Config.MAIL_SEND_RATE,
+        max_messages=Config.MAIL_MAX_MESSAGES_PER_CONNECTION,
+        idle_timeout=Config.MAIL_CONNECTION_IDLE_TIMEOUT,
+    )
@@ -1,12 +1,22 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.configs.settings import VERSION, SERVER_HOST, SERVER_PORT
-from app.database.main import init_db
+import asyncio
+import logging
+from app.configs.settings import VERSION, SERVER_PORT
+from app.database.main import async_engine
+from app.database.redis import redis_client, sync_revoked_tokens
+from app.database.replicas import monitor_replicas, replicas, sync_recent_writers
+from app.books.suggest import sync_suggestion_index
+from app.outbox import dispatch_email_outbox
+from app.metrics import mark_process_dead, metrics_response
+from app.auth.hashing import password_hasher
+from app.warmup import liveness_response, readiness_response, warm_up
 
 # routes
 from app.books.routes import book_router
 from app.auth.routes import auth_router
 from app.reviews.routes import review_router
+from app.admin.routes import admin_router
 
 from .errors import register_all_errors
 from .middlewares import register_middlewares
@@ -14,9 +24,28 @@ from .middlewares import register_middlewares
 
 @asynccontextmanager
 async def lifeSpan_events(app: FastAPI):
-    print(f"server starting on port: {SERVER_PORT}")
-    await init_db()
+    logging.info(f"server starting on port: {SERVER_PORT}")
+    # serving starts right away; /health/ready reports when warm-up is done
+    background_tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(sync_revoked_tokens()),
+        asyncio.create_task(sync_suggestion_index()),
+        asyncio.create_task(dispatch_email_outbox()),
+    ]
+    if replicas:
+        background_tasks += [
+            asyncio.create_task(monitor_replicas()),
+            asyncio.create_task(sync_recent_writers()),
+        ]
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await redis_client.aclose()
+    await replicas.dispose()
+    await async_engine.dispose()
+    password_hasher.shutdown()
+    mark_process_dead()
 
 
 def initialize_backend_application(lifespan_events) -> FastAPI:
@@ -32,6 +61,11 @@ def initialize_backend_application(lifespan_events) -> FastAPI:
     app.include_router(auth_router, prefix=f"/api/{VERSION}/auth", tags="auth")
     app.include_router(book_router, prefix=f"/api/{VERSION}/books", tags="books")
     app.include_router(review_router, prefix=f"/api/{VERSION}/reviews", tags="reviews")
+    app.include_router(admin_router, prefix=f"/api/{VERSION}/admin", tags="admin")
+    # scraped by Prometheus; keep it reachable from the monitoring network only
+    app.add_api_route("/metrics", metrics_response, include_in_schema=False)
+    app.add_api_route("/health/live", liveness_response, include_in_schema=False)
+    app.add_api_route("/health/ready", readiness_response, include_in_schema=False)
 
     return app
 
@@ -40,6 +74,9 @@ app: FastAPI = initialize_backend_application(lifeSpan_events)
 
 
 if __name__ == "__main__":
-    import uvicorn
+    import os
+    import sys
 
-    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT)
+    # the database engines above were created before app.server could size
+    # the pools, so start it in a fresh interpreter
+    os.execv(sys.executable, [sys.executable, "-m", "app.server"])
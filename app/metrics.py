@@ -0,0 +1,129 @@
+"""Prometheus metrics, served at /metrics.
+
+With several worker processes (uvicorn --workers, gunicorn), point the
+PROMETHEUS_MULTIPROC_DIR environment variable at an empty directory that all
+workers share, and clear it on every deploy; python -m app.server does both.
+Each worker then writes its samples there and a scrape of any worker returns
+the totals of all of them.
+"""
+
+import os
+import threading
+import time
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# requests that did not match a route share one label value, so that scans
+# for random URLs cannot blow up the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are sent, by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by a rate limiter",
+    ["method", "route"],
+)
+
+# the pool label is "primary" or the replica's "replica-<n>"
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured database pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections in use",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITING = Gauge(
+    "db_pool_waiting",
+    "Callers waiting for a database connection",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a database connection",
+    ["pool"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Database connection checkouts that timed out", ["pool"]
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round trip time by command; pipelines count as one PIPELINE call",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+
+CELERY_ENQUEUE_DURATION = Histogram(
+    "celery_enqueue_duration_seconds",
+    "Time to publish a task to the broker",
+    ["task"],
+    buckets=FAST_BUCKETS,
+)
+
+
+def route_template(request) -> str:
+    route = request.scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+# publishes happen on whichever thread calls delay(), so the start times are
+# kept per thread
+_publishing = threading.local()
+
+
+# connected to Celery's publish signals in app/celery.py
+def task_publish_started(**kwargs):
+    _publishing.started = time.perf_counter()
+
+
+def task_published(sender=None, **kwargs):
+    started = getattr(_publishing, "started", None)
+    if started is not None:
+        CELERY_ENQUEUE_DURATION.labels(sender).observe(time.perf_counter() - started)
+        _publishing.started = None
+
+
+def mark_process_dead() -> None:
+    # drops this worker's live gauges from the shared multiprocess directory
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def metrics_response() -> Response:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,53 +1,98 @@
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import logging
+import time
 
-from app.database.redis import redis_client
+from app.config import Config
+from app.database.instrumentation import QueryStats, current_query_stats
+from app.database.replicas import record_write, replicas
+from app.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    RATE_LIMIT_REJECTIONS,
+    route_template,
+)
 
-RATE_LIMIT = 100  # number of requests allowed in timeframe
-TIME_WINDOW = 60  # time window in seconds 
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 def register_middlewares(app: FastAPI):
+    @app.middleware("http")
+    async def read_your_writes(request: Request, call_next):
+        response = await call_next(request)
+
+        # the user's next reads go to the primary for a while (see
+        # app/database/replicas.py)
+        token_data = getattr(request.state, "token_data", None)
+        if (
+            replicas
+            and token_data is not None
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            await record_write(token_data["user"]["userId"])
+
+        return response
+
     @app.middleware("http")
     async def rate_limit(request: Request, call_next):
-        if not redis_client:
-            logging.error(msg="redis client is not initialized")
-            JSONResponse(
-                {"error": "something went wrong"},
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        client_ip = request.client.host
-        url_path = request.url.path
-        redis_key = f"rate_limit: {client_ip} {url_path}"
-
-        # check for count
-        current_count = await redis_client.get(redis_key)
-        if current_count is None:
-            # init count and set expiry for this key
-            await redis_client.set(redis_key, 1, ex=TIME_WINDOW)
-        else:
-            current_count = int(current_count)
-            if current_count >= RATE_LIMIT:
-                return JSONResponse(
-                    {"error": "Too many requests, try again later."},
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                )
-            await redis_client.incr(redis_key)
-
-        # proceeds to the next middleware or route
+        # limits are enforced by the RateLimiter dependencies declared on the
+        # routers; this only reports the outcome on every response
         response = await call_next(request)
+
+        result = getattr(request.state, "rate_limit", None)
+        if result is not None:
+            response.headers.update(result.headers())
+            if not result.allowed:
+                RATE_LIMIT_REJECTIONS.labels(
+                    request.method, route_template(request)
+                ).inc()
+
+        return response
+
+    @app.middleware("http")
+    async def query_stats(request: Request, call_next):
+        stats = QueryStats(request.scope)
+        token = current_query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            current_query_stats.reset(token)
+
+        if Config.SQL_SERVER_TIMING and stats.count:
+            response.headers.append("Server-Timing", stats.server_timing())
         return response
 
+    @app.middleware("http")
+    async def metrics(request: Request, call_next):
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(request.method)
+        in_progress.inc()
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            in_progress.dec()
+            HTTP_REQUEST_DURATION.labels(
+                request.method, route_template(request), status_code
+            ).observe(time.perf_counter() - start)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
         allow_credentials=True,
+        expose_headers=[
+            "RateLimit-Limit",
+            "RateLimit-Remaining",
+            "RateLimit-Reset",
+            "Retry-After",
+            "Server-Timing",
+        ],
     )
 
     app.add_middleware(
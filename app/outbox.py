@@ -0,0 +1,72 @@
+import asyncio
+import importlib
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import Config
+from app.database.main import async_session_maker
+from app.database.models import EmailOutbox
+
+
+def add_email_to_outbox(
+    session: AsyncSession, recipients: list[str], subject: str, body: str
+) -> None:
+    """Queue an email; it is sent only if the session's transaction commits"""
+    session.add(EmailOutbox(recipients=recipients, subject=subject, body=body))
+
+
+async def _dispatch_batch(send_email_batch) -> int:
+    async with async_session_maker() as session:
+        # SKIP LOCKED lets every worker run a dispatcher without two of them
+        # enqueueing the same rows
+        result = await session.exec(
+            select(EmailOutbox)
+            .order_by(EmailOutbox.id)
+            .limit(Config.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        emails = result.all()
+        if not emails:
+            return 0
+
+        batch = [
+            {
+                "recipients": email.recipients,
+                "subject": email.subject,
+                "body": email.body,
+            }
+            for email in emails
+        ]
+        # the broker publish blocks, so it runs off the event loop
+        await asyncio.to_thread(send_email_batch.delay, batch)
+
+        # a crash before this commit re-sends the batch: delivery is at least once
+        await session.exec(
+            delete(EmailOutbox).where(EmailOutbox.id.in_([e.id for e in emails]))
+        )
+        await session.commit()
+        return len(emails)
+
+
+async def dispatch_email_outbox() -> None:
+    """Drain the email outbox into Celery; runs for the lifetime of the worker"""
+    # Celery takes a while to import and, in the API, only this task needs it,
+    # so it is loaded here, off the event loop, rather than with app.main
+    tasks = await asyncio.to_thread(importlib.import_module, "app.celery")
+    from celery.exceptions import CeleryError
+    from kombu.exceptions import KombuError
+
+    while True:
+        try:
+            dispatched = await _dispatch_batch(tasks.send_email_batch)
+        except (SQLAlchemyError, CeleryError, KombuError, OSError) as e:
+            logging.error(f"email outbox dispatch failed: {e}")
+            dispatched = 0
+
+        # keep draining while there is a backlog
+        if dispatched < Config.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(Config.OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,210 @@
+import logging
+import math
+import time
+from typing import NamedTuple, Optional
+
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from app.auth.utils import decode_token
+from app.config import Config
+from app.database.redis import redis_client
+from app.errors import RateLimitExceeded
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit:"
+
+# Every algorithm below is a single Lua script, so a request costs exactly one
+# Redis round trip and the check and the increment happen atomically.
+
+FIXED_WINDOW_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+    ttl = tonumber(ARGV[1])
+end
+return {current, ttl}
+"""
+
+# sliding window counter: weights the previous fixed window by how much of it
+# still overlaps the sliding window and adds the current window's count
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local count = math.floor(previous * (window - elapsed) / window) + current
+if count >= limit then
+    return {0, count}
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, count + 1}
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry, math.ceil((capacity - tokens) / rate)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # seconds until the quota is fully available again
+    retry_after: int  # seconds until the next request is allowed
+
+    def headers(self) -> dict:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class FixedWindow:
+    def __init__(self, limit: int, window: int) -> None:
+        self.limit = limit
+        self.window = window
+        self.name = f"fixed:{limit}/{window}"
+        self.script = redis_client.register_script(FIXED_WINDOW_SCRIPT)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        count, ttl_ms = await self.script(keys=[key], args=[self.window * 1000])
+        reset = math.ceil(ttl_ms / 1000)
+        return RateLimitResult(
+            allowed=count <= self.limit,
+            limit=self.limit,
+            remaining=max(self.limit - count, 0),
+            reset=reset,
+            retry_after=reset,
+        )
+
+
+class SlidingWindow:
+    def __init__(self, limit: int, window: int) -> None:
+        self.limit = limit
+        self.window = window
+        self.name = f"sliding:{limit}/{window}"
+        self.script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        window_ms = self.window * 1000
+        now_ms = int(time.time() * 1000)
+        start = now_ms - now_ms % window_ms
+        allowed, count = await self.script(
+            keys=[f"{key}:{start}", f"{key}:{start - window_ms}"],
+            args=[self.limit, window_ms, now_ms - start],
+        )
+        reset = math.ceil((start + window_ms - now_ms) / 1000)
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limit,
+            remaining=max(self.limit - count, 0),
+            reset=reset,
+            retry_after=reset,
+        )
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, refill_rate: float) -> None:
+        """refill_rate is the number of tokens added back per second"""
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.name = f"bucket:{capacity}/{refill_rate}"
+        self.script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        allowed, tokens, retry_ms, full_ms = await self.script(
+            keys=[key],
+            args=[
+                self.capacity,
+                repr(self.refill_rate / 1000),
+                int(time.time() * 1000),
+            ],
+        )
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.capacity,
+            remaining=tokens,
+            reset=math.ceil(full_ms / 1000),
+            retry_after=math.ceil(retry_ms / 1000),
+        )
+
+
+def get_client_identity(request: Request) -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        token_data = decode_token(token)
+        if token_data is not None:
+            return f"user:{token_data['user']['userId']}"
+
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimiter:
+    """Route dependency that enforces a limit per route template and client.
+
+    Declare it on a router or a single route, e.g.
+    ``dependencies=[Depends(RateLimiter(TokenBucket(5, 0.1)))]``. Limiters can
+    be stacked; the response headers describe the most restrictive one.
+    """
+
+    def __init__(self, algorithm) -> None:
+        self.algorithm = algorithm
+
+    async def __call__(self, request: Request) -> None:
+        if not Config.RATE_LIMIT_ENABLED:
+            return
+
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else request.url.path
+        key = (
+            f"{RATE_LIMIT_KEY_PREFIX}{self.algorithm.name}:"
+            f"{request.method}:{route_path}:{get_client_identity(request)}"
+        )
+
+        try:
+            result = await self.algorithm.hit(key)
+        except RedisError as e:
+            # fail open: an unavailable limiter must not take the API down
+            logging.error(f"rate limiter unavailable: {e}")
+            return
+
+        current: Optional[RateLimitResult] = getattr(
+            request.state, "rate_limit", None
+        )
+        if current is None or result.remaining < current.remaining:
+            request.state.rate_limit = result
+
+        if not result.allowed:
+            raise RateLimitExceeded(headers=result.headers())
+
+
+# applied to every route through the routers; stricter limits are declared on
+# the individual routes that need them
+default_rate_limiter = RateLimiter(
+    FixedWindow(Config.RATE_LIMIT, Config.RATE_LIMIT_WINDOW)
+)
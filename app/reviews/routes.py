@@ -1,28 +1,43 @@
 from fastapi import APIRouter, Depends, status
 from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+from typing import Optional
 
-from app.auth.dependencies import RoleChecker, get_current_user
+from app.auth.dependencies import RoleChecker, get_current_user, get_read_session
 from app.database.main import get_session
-from app.database.models import User
+from app.auth.schemas import UserPrincipal
+from app.ratelimit import default_rate_limiter
+from app.export import ExportFormat, as_naive_utc, export_response
 
 from .schemas import ReviewCreateModel
 from .service import ReviewService
 
 review_service = ReviewService()
-review_router = APIRouter()
+review_router = APIRouter(dependencies=[Depends(default_rate_limiter)])
 admin_role_checker = Depends(RoleChecker(["admin"]))
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
 @review_router.get("/", dependencies=[admin_role_checker])
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
+async def get_all_reviews(session: AsyncSession = Depends(get_read_session)):
     books = await review_service.get_all_reviews(session)
 
     return books
 
 
+@review_router.get("/export", dependencies=[admin_role_checker])
+async def export_reviews(
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: Optional[datetime] = None,
+):
+    statement = review_service.get_reviews_export_statement(as_naive_utc(updated_since))
+    return await export_response(statement, format, name="reviews")
+
+
 @review_router.get("/{review_id}", dependencies=[user_role_checker])
-async def get_review(review_id: str, session: AsyncSession = Depends(get_session)):
+async def get_review(
+    review_id: int, session: AsyncSession = Depends(get_read_session)
+):
     book = await review_service.get_review(review_id, session)
 
     if not book:
@@ -33,11 +48,11 @@ async def get_review(review_id: str, session: AsyncSession = Depends(get_session
 async def add_review_to_books(
     book_id: str,
     review_data: ReviewCreateModel,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     new_review = await review_service.add_review_to_book(
-        user_email=current_user.email,
+        user_id=current_user.id,
         review_data=review_data,
         book_id=book_id,
         session=session,
@@ -52,12 +67,12 @@ async def add_review_to_books(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def delete_review(
-    review_id: str,
-    current_user: User = Depends(get_current_user),
+    review_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     await review_service.delete_review_to_from_book(
-        review_id=review_id, user_email=current_user.email, session=session
+        review_id=review_id, user_id=current_user.id, session=session
     )
 
     return None
@@ -6,13 +6,13 @@ from pydantic import BaseModel, Field
 
 
 class ReviewModel(BaseModel):
-    uid: uuid.UUID
+    id: int
     rating: int = Field(lt=5)
     review_text: str
-    user_uid: Optional[uuid.UUID]
-    book_uid: Optional[uuid.UUID]
+    user_id: Optional[uuid.UUID]
+    book_id: Optional[uuid.UUID]
     created_at: datetime
-    update_at: datetime
+    updated_at: datetime
 
 
 class ReviewCreateModel(BaseModel):
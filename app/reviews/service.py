@@ -1,32 +1,31 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 from sqlmodel import select, desc
+from sqlalchemy import Select
+from datetime import datetime
+from typing import Optional
 import uuid
 import logging
 
 from app.database.models import Review
-from app.auth.service import UserService
 from app.books.service import BookService
+from app.books.cache import invalidate_book_detail
 from .schemas import ReviewCreateModel
 
 
 book_service = BookService()
-user_service = UserService()
 
 
 class ReviewService:
     async def add_review_to_book(
         self,
-        user_email: str,
+        user_id: uuid.UUID,
         book_id: uuid.UUID,
         review_data: ReviewCreateModel,
         session: AsyncSession,
     ):
         try:
             book = await book_service.get_book(book_id=book_id, session=session)
-            user = await user_service.get_user_by_email(
-                email=user_email, session=session
-            )
 
             review_data_dict = review_data.model_dump()
 
@@ -35,16 +34,13 @@ class ReviewService:
                     detail="Book not found", status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            if not user:
-                raise HTTPException(
-                    detail="User not found", status_code=status.HTTP_404_NOT_FOUND
-                )
-
-            new_review = Review(**review_data_dict, user=user, book=book)
+            new_review = Review(**review_data_dict, user_id=user_id, book_id=book.id)
 
             session.add(new_review)
+            await book_service.add_rating(book.id, new_review.rating, session)
 
             await session.commit()
+            await invalidate_book_detail(book.id)
 
             return new_review
 
@@ -55,7 +51,7 @@ class ReviewService:
                 detail="Something went wrong on server",
             )
 
-    async def get_review(self, review_id: str, session: AsyncSession):
+    async def get_review(self, review_id: int, session: AsyncSession):
         statement = select(Review).where(Review.id == review_id)
 
         result = await session.exec(statement)
@@ -69,19 +65,27 @@ class ReviewService:
 
         return result.all()
 
+    def get_reviews_export_statement(
+        self, updated_since: Optional[datetime]
+    ) -> Select:
+        statement = select(Review.__table__).order_by(Review.updated_at, Review.id)
+        if updated_since is not None:
+            statement = statement.where(Review.updated_at >= updated_since)
+        return statement
+
     async def delete_review_to_from_book(
-        self, review_id: str, user_email: str, session: AsyncSession
+        self, review_id: int, user_id: uuid.UUID, session: AsyncSession
     ):
-        user = await user_service.get_user_by_email(user_email, session)
-
         review = await self.get_review(review_id, session)
 
-        if not review or (review.user != user):
+        if not review or (review.user_id != user_id):
             raise HTTPException(
                 detail="you cannot delete this review",
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-        session.delete(review)
+        await session.delete(review)
+        await book_service.remove_rating(review.book_id, review.rating, session)
 
         await session.commit()
+        await invalidate_book_detail(review.book_id)
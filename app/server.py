@@ -0,0 +1,113 @@
+"""Production entry point: python -m app.server
+
+Runs uvicorn with WEB_WORKERS worker processes on uvloop and httptools. Each
+worker has its own database pool, so when DB_MAX_CONNECTIONS is set the pool
+size and overflow of every worker are cut down until all of them together
+stay within it. The limit is per database server: every read replica gets a
+pool of the same size in each worker, so each replica sees at most as many
+connections as the primary.
+
+On SIGTERM uvicorn stops accepting connections, waits up to
+WEB_GRACEFUL_TIMEOUT seconds for in-flight requests, and only then runs the
+lifespan shutdown that closes the pools.
+
+Metrics of all workers are collected in PROMETHEUS_MULTIPROC_DIR, which is
+emptied on start. With more than one worker and no directory configured, a
+temporary one is created for the lifetime of the server.
+"""
+
+import atexit
+import glob
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Optional, Tuple
+
+import uvicorn
+
+from app.config import Config
+from app.configs.settings import SERVER_HOST, SERVER_PORT
+
+
+def default_workers() -> int:
+    # CPUs this process may run on, which can be fewer than the machine has
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def pool_sizing(workers: int, max_connections: Optional[int]) -> Tuple[int, int]:
+    """Per-worker (pool_size, max_overflow) that keeps workers * (pool_size +
+    max_overflow) within max_connections"""
+    pool_size, max_overflow = Config.DB_POOL_SIZE, Config.DB_MAX_OVERFLOW
+    if max_connections is None:
+        return pool_size, max_overflow
+
+    per_worker = max_connections // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"DB_MAX_CONNECTIONS={max_connections} is too low for {workers} workers"
+        )
+    pool_size = min(pool_size, per_worker)
+    return pool_size, min(max_overflow, per_worker - pool_size)
+
+
+def prepare_multiproc_dir(workers: int) -> Optional[str]:
+    """Empty PROMETHEUS_MULTIPROC_DIR, exported for the worker processes"""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        if workers == 1:
+            return None
+        path = tempfile.mkdtemp(prefix="bookhub-metrics-")
+        atexit.register(shutil.rmtree, path, ignore_errors=True)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+        return path
+
+    # samples left by the processes of an earlier run would be added to ours
+    os.makedirs(path, exist_ok=True)
+    for sample_file in glob.glob(os.path.join(path, "*.db")):
+        os.remove(sample_file)
+    return path
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    workers = Config.WEB_WORKERS or default_workers()
+
+    try:
+        pool_size, max_overflow = pool_sizing(workers, Config.DB_MAX_CONNECTIONS)
+    except ValueError as e:
+        sys.exit(str(e))
+    # with one worker uvicorn serves the app from this process, whose Config
+    # has been loaded already; more workers are separate processes that read
+    # their settings again on import
+    Config.DB_POOL_SIZE = pool_size
+    Config.DB_MAX_OVERFLOW = max_overflow
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    logging.info(
+        f"starting {workers} workers, database pool {pool_size} + "
+        f"{max_overflow} overflow each"
+    )
+
+    multiproc_dir = prepare_multiproc_dir(workers)
+    if multiproc_dir is not None:
+        logging.info(f"collecting metrics of all workers in {multiproc_dir}")
+
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=Config.WEB_BACKLOG,
+        timeout_keep_alive=Config.WEB_KEEPALIVE,
+        timeout_graceful_shutdown=Config.WEB_GRACEFUL_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Startup warm-up and the health probes.
+
+A new worker starts with empty connection pools, cold statement caches and
+passlib not loaded yet, and its first requests would pay for all of it. The
+lifespan runs warm_up() in the background while /health/ready answers 503;
+point the load balancer's or Kubernetes' readiness check at it so that a
+worker only gets traffic once it is warm. /health/live only tells that the
+process is serving requests.
+"""
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.service import UserService, USER_DETAIL_LOADER_OPTIONS
+from app.auth.utils import load_passwd_context
+from app.books.schemas import BookListQuery
+from app.books.service import BookService, BOOK_DETAIL_LOADER_OPTIONS
+from app.config import Config
+from app.configs.settings import DEFAULT_PAGE_SIZE
+from app.database.main import init_db
+from app.database.redis import init_redis
+
+# matches no row; the statements are what gets warmed, not the data
+NO_ID = UUID(int=0)
+
+user_service = UserService()
+book_service = BookService()
+
+
+class WorkerState:
+    def __init__(self) -> None:
+        self.ready = False
+
+
+worker_state = WorkerState()
+
+
+async def run_hot_statements(session: AsyncSession) -> None:
+    # the lookups behind login, authentication, /auth/me and the book pages,
+    # built by the same code, so SQLAlchemy's compiled cache and asyncpg's
+    # prepared statements on this connection are hit by the real requests
+    await user_service.get_user_by_email("", session)
+    await user_service.get_user_by_id(NO_ID, session)
+    await user_service.get_user_by_id(
+        NO_ID, session, options=USER_DETAIL_LOADER_OPTIONS
+    )
+    await book_service.get_all_books(session, BookListQuery(), DEFAULT_PAGE_SIZE, None)
+    await book_service.get_book(NO_ID, session, options=BOOK_DETAIL_LOADER_OPTIONS)
+
+
+async def warm_up() -> None:
+    """Get the worker ready for traffic, then mark it ready; retries until the
+    database and Redis can be reached"""
+    while True:
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                init_db(Config.DB_WARMUP_CONNECTIONS, warm_up=run_hot_statements),
+                init_redis(Config.REDIS_WARMUP_CONNECTIONS),
+                asyncio.to_thread(load_passwd_context),
+            )
+        except (SQLAlchemyError, RedisError, OSError) as e:
+            logging.error(f"warm-up failed, retrying: {e}")
+            await asyncio.sleep(1)
+            continue
+
+        worker_state.ready = True
+        logging.info(f"worker ready, warm-up took {time.perf_counter() - start:.2f}s")
+        return
+
+
+def liveness_response() -> JSONResponse:
+    return JSONResponse({"status": "alive"})
+
+
+def readiness_response() -> JSONResponse:
+    if not worker_state.ready:
+        return JSONResponse(
+            {"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return JSONResponse({"status": "ready"})
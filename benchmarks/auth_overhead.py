@@ -0,0 +1,69 @@
+"""Per-request token verification cost, before and after the verified-JWT cache.
+
+    python -m benchmarks.auth_overhead [--iterations N]
+
+"before" replays what TokenBearer used to do for every request: decode the
+token twice and log a traceback for invalid tokens. "after" calls
+decode_token, which verifies a token once and then serves it from the cache.
+"""
+
+import argparse
+import logging
+import timeit
+
+import jwt
+
+from app.auth.utils import create_access_token, decode_token, verified_tokens
+from app.config import Config
+
+
+def decode_uncached(token: str):
+    try:
+        return jwt.decode(
+            jwt=token, key=Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM]
+        )
+    except jwt.PyJWTError as error:
+        logging.exception(error)
+        return None
+
+
+def before(token: str):
+    decode_uncached(token)
+    decode_uncached(token)
+
+
+def after(token: str):
+    decode_token(token)
+
+
+def report(name: str, fn, token: str, iterations: int) -> float:
+    per_call = timeit.timeit(lambda: fn(token), number=iterations) / iterations
+    print(f"{name:<28} {per_call * 1e6:9.2f} us/request")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    # keep tracebacks off the terminal without skipping their formatting cost
+    logging.basicConfig(filename="/dev/null")
+
+    token = create_access_token(
+        user_data={"email": "bench@example.com", "role": "user", "userId": "0"}
+    )
+    bad_token = token[:-4] + "AAAA"
+
+    verified_tokens.clear()
+    old = report("valid token, before", before, token, args.iterations)
+    new = report("valid token, after", after, token, args.iterations)
+    print(f"{'speedup':<28} {old / new:9.1f}x")
+
+    old = report("invalid token, before", before, bad_token, args.iterations)
+    new = report("invalid token, after", after, bad_token, args.iterations)
+    print(f"{'speedup':<28} {old / new:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Load test of the API hot paths with per-endpoint latency percentiles.
+
+    python -m benchmarks.load [--base-url URL] [--concurrency N] [--duration S]
+                              [--scenarios NAME,...] [--output FILE]
+
+Start the API with RATE_LIMIT_ENABLED=false against a catalog seeded by
+benchmarks.seed, then run this on the same box. Each scenario runs alone for
+--duration seconds with --concurrency clients that send requests back to
+back. The report is JSON (stdout or --output) with the current git commit,
+throughput and p50/p95/p99 per scenario, so two runs can be diffed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, WORDS, bench_email
+
+API = "/api/v1"
+# how deep a client pages through GET /books/ and searches before starting over
+MAX_PAGES = 10
+
+
+class Context:
+    def __init__(self, users: int) -> None:
+        self.users = users
+        self.tokens: list = []
+        self.book_ids: list = []
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {random.choice(self.tokens)}"}
+
+
+async def login(client: httpx.AsyncClient, ctx: Context, state: dict):
+    return await client.post(
+        f"{API}/auth/login",
+        json={
+            "email": bench_email(random.randrange(ctx.users)),
+            "password": BENCH_PASSWORD,
+        },
+    )
+
+
+async def books_page(client: httpx.AsyncClient, ctx: Context, state: dict):
+    params = {"limit": 20}
+    if state.get("cursor"):
+        params["cursor"] = state["cursor"]
+    response = await client.get(f"{API}/books/", params=params, headers=ctx.auth())
+
+    state["pages"] = state.get("pages", 0) + 1
+    next_cursor = response.json().get("next_cursor") if response.is_success else None
+    if next_cursor is None or state["pages"] >= MAX_PAGES:
+        state.clear()
+    else:
+        state["cursor"] = next_cursor
+    return response
+
+
+async def search(client: httpx.AsyncClient, ctx: Context, state: dict):
+    # every seeded title is made of WORDS, so each of them is a common term
+    # matching a large share of the catalog: the worst case for ranking
+    if "q" not in state:
+        state["q"] = random.choice(WORDS)
+    params = {"q": state["q"], "limit": 20}
+    if state.get("cursor"):
+        params["cursor"] = state["cursor"]
+    response = await client.get(
+        f"{API}/books/search", params=params, headers=ctx.auth()
+    )
+
+    state["pages"] = state.get("pages", 0) + 1
+    next_cursor = response.json().get("next_cursor") if response.is_success else None
+    if next_cursor is None or state["pages"] >= MAX_PAGES:
+        state.clear()
+    else:
+        state["cursor"] = next_cursor
+    return response
+
+
+async def book_detail(client: httpx.AsyncClient, ctx: Context, state: dict):
+    book_id = random.choice(ctx.book_ids)
+    return await client.get(f"{API}/books/{book_id}", headers=ctx.auth())
+
+
+async def review_create(client: httpx.AsyncClient, ctx: Context, state: dict):
+    book_id = random.choice(ctx.book_ids)
+    return await client.post(
+        f"{API}/reviews/book/{book_id}",
+        json={"rating": random.randint(0, 4), "review_text": "load test review"},
+        headers=ctx.auth(),
+    )
+
+
+async def me(client: httpx.AsyncClient, ctx: Context, state: dict):
+    return await client.get(f"{API}/auth/me", headers=ctx.auth())
+
+
+SCENARIOS = {
+    "login": login,
+    "books_page": books_page,
+    "search": search,
+    "book_detail": book_detail,
+    "review_create": review_create,
+    "me": me,
+}
+
+
+async def prepare(client: httpx.AsyncClient, ctx: Context, sessions: int) -> None:
+    for i in range(min(sessions, ctx.users)):
+        response = await client.post(
+            f"{API}/auth/login",
+            json={"email": bench_email(i), "password": BENCH_PASSWORD},
+        )
+        response.raise_for_status()
+        ctx.tokens.append(response.json()["access_token"])
+
+    params = {"limit": 100}
+    for _ in range(5):
+        response = await client.get(f"{API}/books/", params=params, headers=ctx.auth())
+        response.raise_for_status()
+        page = response.json()
+        ctx.book_ids += [book["id"] for book in page["items"]]
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    if not ctx.book_ids:
+        sys.exit("no books found; run python -m benchmarks.seed first")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, ctx: Context, scenario, concurrency: int, duration: float
+) -> dict:
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        state = {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, ctx, state)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    result = {
+        "requests": sum(statuses.values()),
+        "errors": errors,
+        "statuses": dict(statuses),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+    }
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100)
+        result.update(
+            p50_ms=round(quantiles[49] * 1000, 2),
+            p95_ms=round(quantiles[94] * 1000, 2),
+            p99_ms=round(quantiles[98] * 1000, 2),
+        )
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=1000, help="users seeded")
+    parser.add_argument("--sessions", type=int, default=50, help="users logged in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    names = args.scenarios.split(",")
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    random.seed(args.seed)
+    started_at = datetime.now(timezone.utc).isoformat()
+    ctx = Context(args.users)
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=30
+    ) as client:
+        await prepare(client, ctx, args.sessions)
+
+        results = {}
+        for name in names:
+            results[name] = await run_scenario(
+                client, ctx, SCENARIOS[name], args.concurrency, args.duration
+            )
+            summary = results[name]
+            print(
+                f"{name:<14} {summary['throughput_rps']:9.1f} req/s  "
+                f"p50 {summary.get('p50_ms', 0):8.2f} ms  "
+                f"p95 {summary.get('p95_ms', 0):8.2f} ms  "
+                f"p99 {summary.get('p99_ms', 0):8.2f} ms  "
+                f"errors {summary['errors']}",
+                file=sys.stderr,
+            )
+
+    report = json.dumps(
+        {
+            "commit": git_commit(),
+            "started_at": started_at,
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Latency of other requests on a worker while it is hit by a login storm.
+
+    python -m benchmarks.login_storm [--logins N] [--concurrency N] [--rounds N]
+
+A probe stands in for a cheap endpoint on the same event loop: a request for
+it arrives every 5 ms and its latency is how long it waits for the loop.
+"before" verifies the passwords on the event loop like login_user used to;
+"after" goes through verify_password and the bounded hashing pool.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.auth.hashing import password_hasher
+from app.auth.utils import get_passwd_context, verify_password
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event, latencies: list) -> None:
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(due - time.perf_counter(), 0))
+        now = time.perf_counter()
+        # every request that arrived while the loop was busy is served now
+        while due <= now:
+            latencies.append(now - due)
+            due += PROBE_INTERVAL
+
+
+async def login_before(password: str, hash: str) -> bool:
+    return get_passwd_context().verify(password, hash)
+
+
+async def login_after(password: str, hash: str) -> bool:
+    return await verify_password(password, hash)
+
+
+async def storm(login, hash: str, logins: int, concurrency: int) -> dict:
+    stop = asyncio.Event()
+    latencies = []
+    probe_task = asyncio.create_task(probe(stop, latencies))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            await login("correct horse battery staple", hash)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "logins_per_s": logins / elapsed,
+        "probe_p50_ms": quantiles[49] * 1000,
+        "probe_p99_ms": quantiles[98] * 1000,
+        "probe_max_ms": max(latencies) * 1000,
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(
+        f"{name:<8} {result['logins_per_s']:8.1f} logins/s   other requests: "
+        f"p50 {result['probe_p50_ms']:7.2f} ms  p99 {result['probe_p99_ms']:7.2f} ms"
+        f"  max {result['probe_max_ms']:7.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=password_hasher.workers)
+    parser.add_argument("--rounds", type=int, default=None)
+    args = parser.parse_args()
+
+    context = get_passwd_context()
+    if args.rounds is not None:
+        context = context.copy(bcrypt__rounds=args.rounds)
+    hash = context.hash("correct horse battery staple")
+
+    report("before", await storm(login_before, hash, args.logins, args.concurrency))
+    report("after", await storm(login_after, hash, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
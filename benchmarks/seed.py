@@ -0,0 +1,196 @@
+"""Seed a large, reproducible catalog for benchmarks/load.py.
+
+    python -m benchmarks.seed [--users N] [--books N] [--reviews N] [--seed N]
+                              [--reset]
+
+Rows are written with COPY, so millions of books take minutes, not hours.
+Every benchmark user is bench{i}@bench.example with BENCH_PASSWORD; --reset
+first deletes those users and everything they own. The same --seed always
+produces the same titles, authors and ratings.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlmodel import text
+
+from app.auth.utils import get_passwd_context
+from app.books.backfill_ratings import STATEMENTS as BACKFILL_RATINGS
+from app.database.main import async_engine
+
+BENCH_EMAIL_DOMAIN = "bench.example"
+BENCH_PASSWORD = "benchmark-password"
+CHUNK_SIZE = 10000
+
+WORDS = (
+    "shadow river silent empire garden winter glass iron northern secret "
+    "last city ocean night fire stone golden lost memory road house light "
+    "storm forest kingdom letters summer machine dream war song island"
+).split()
+NAMES = (
+    "Ada Ben Clara David Elena Farid Grace Hiro Ines Jonas Kofi Lena Mateo "
+    "Nadia Omar Priya Quinn Rosa Sami Tara"
+).split()
+SURNAMES = (
+    "Adler Brooks Costa Duarte Evans Fischer Gupta Haddad Ito Jensen Kim "
+    "Larsen Moreau Novak Okafor Petrov Reyes Sato Tanaka Weber"
+).split()
+PUBLISHERS = ["Harbor House", "Northlight", "Meridian", "Blue Fern", "Atlas"]
+LANGUAGES = ["en", "en", "en", "fr", "de", "es"]
+
+BOOK_COLUMNS = (
+    "id title author publisher publish_date page_count language user_id "
+    "review_count rating_sum average_rating created_at updated_at"
+).split()
+REVIEW_COLUMNS = "review_text rating book_id user_id created_at updated_at".split()
+USER_COLUMNS = (
+    "id username email first_name last_name is_verified password_hash role "
+    "created_at updated_at"
+).split()
+
+BENCH_USER_IDS = f"SELECT id FROM users WHERE email LIKE '%@{BENCH_EMAIL_DOMAIN}'"
+RESET_STATEMENTS = [
+    f"""
+    DELETE FROM reviews
+    WHERE user_id IN ({BENCH_USER_IDS})
+       OR book_id IN (SELECT id FROM books WHERE user_id IN ({BENCH_USER_IDS}))
+    """,
+    f"DELETE FROM books WHERE user_id IN ({BENCH_USER_IDS})",
+    f"DELETE FROM users WHERE email LIKE '%@{BENCH_EMAIL_DOMAIN}'",
+]
+
+
+def bench_email(i: int) -> str:
+    return f"bench{i}@{BENCH_EMAIL_DOMAIN}"
+
+
+def chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def copy(conn, table: str, columns: list, rows) -> int:
+    # COPY is an asyncpg feature, so it goes through the driver connection
+    raw = await conn.get_raw_connection()
+    total = 0
+    for chunk in chunks(rows):
+        await raw.driver_connection.copy_records_to_table(
+            table, records=chunk, columns=columns
+        )
+        total += len(chunk)
+    return total
+
+
+def generate_users(rng: random.Random, count: int, password_hash: str, now: datetime):
+    for i in range(count):
+        yield (
+            uuid.UUID(int=rng.getrandbits(128)),
+            f"bench{i}",
+            bench_email(i),
+            "Bench",
+            f"User {i}",
+            True,
+            password_hash,
+            "user",
+            now,
+            now,
+        )
+
+
+def generate_books(rng: random.Random, count: int, user_ids: list, now: datetime):
+    for i in range(count):
+        created_at = now - timedelta(seconds=count - i)
+        yield (
+            uuid.UUID(int=rng.getrandbits(128)),
+            " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).title(),
+            f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}",
+            rng.choice(PUBLISHERS),
+            datetime(1950, 1, 1) + timedelta(days=rng.randrange(27000)),
+            rng.randint(80, 900),
+            rng.choice(LANGUAGES),
+            rng.choice(user_ids),
+            0,
+            0,
+            0.0,
+            created_at,
+            created_at,
+        )
+
+
+def generate_reviews(
+    rng: random.Random, count: int, book_ids: list, user_ids: list, now: datetime
+):
+    for _ in range(count):
+        yield (
+            " ".join(rng.choices(WORDS, k=12)),
+            rng.randint(0, 4),
+            rng.choice(book_ids),
+            rng.choice(user_ids),
+            now,
+            now,
+        )
+
+
+async def seed(args) -> None:
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    # hashed at the configured cost so logins do not trigger a rehash
+    password_hash = get_passwd_context().hash(BENCH_PASSWORD)
+
+    async with async_engine.begin() as conn:
+        if args.reset:
+            for statement in RESET_STATEMENTS:
+                await conn.execute(text(statement))
+
+        start = time.perf_counter()
+        users = list(generate_users(rng, args.users, password_hash, now))
+        await copy(conn, "users", USER_COLUMNS, users)
+        user_ids = [user[0] for user in users]
+
+        book_ids = []
+
+        def remember_ids(rows):
+            for row in rows:
+                book_ids.append(row[0])
+                yield row
+
+        books = generate_books(rng, args.books, user_ids, now)
+        await copy(conn, "books", BOOK_COLUMNS, remember_ids(books))
+        reviews = generate_reviews(rng, args.reviews, book_ids, user_ids, now)
+        await copy(conn, "reviews", REVIEW_COLUMNS, reviews)
+
+        # the aggregates are maintained by the API; COPY bypasses it
+        for statement in BACKFILL_RATINGS:
+            await conn.execute(text(statement))
+
+    await async_engine.dispose()
+    print(
+        f"seeded {args.users} users, {args.books} books and {args.reviews} "
+        f"reviews in {time.perf_counter() - start:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset", action="store_true", help="delete earlier benchmark data first"
+    )
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cost of rendering a large book listing with and without FAST_SERIALIZATION.
+
+    python -m benchmarks.serialization [--rows N] [--repeat N]
+
+"before" is what FastAPI does for a route with response_model=BookPage:
+validate the ORM objects, serialize them to dicts and json.dumps the result.
+"after" is app.serialization.render_json. The two bodies are compared byte
+for byte before anything is timed.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.books.schemas import BookPage
+from app.database.models import Book
+from app.serialization import render_json
+
+
+def make_books(rows: int) -> list:
+    rng = random.Random(42)
+    now = datetime(2024, 1, 1, 12, 30)
+    books = []
+    for i in range(rows):
+        review_count = rng.randint(0, 50)
+        rating_sum = rng.randint(0, review_count * 4)
+        books.append(
+            Book(
+                id=uuid.UUID(int=rng.getrandbits(128)),
+                title=f"Book {i} – Ünïcode",
+                author="Ada Lovelace",
+                publisher="Meridian",
+                publish_date=datetime(1950, 1, 1) + timedelta(days=i % 27000),
+                page_count=rng.randint(80, 900),
+                language="en",
+                user_id=uuid.UUID(int=rng.getrandbits(128)),
+                review_count=review_count,
+                rating_sum=rating_sum,
+                average_rating=rating_sum / review_count if review_count else 0.0,
+                created_at=now - timedelta(seconds=i),
+                updated_at=now,
+            )
+        )
+    return books
+
+
+async def render_before(field, content) -> bytes:
+    value = await serialize_response(field=field, response_content=content)
+    return JSONResponse(value).body
+
+
+async def render_after(field, content) -> bytes:
+    return render_json(BookPage, content)
+
+
+async def best_of(render, field, content, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await render(field, content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    content = {"items": make_books(args.rows), "next_cursor": "eyJrIjoxfQ=="}
+    field = create_model_field(name="BookPage", type_=BookPage, mode="serialization")
+
+    before = await render_before(field, content)
+    after = await render_after(field, content)
+    if before != after:
+        raise SystemExit("FAST_SERIALIZATION output differs from FastAPI's")
+
+    print(f"{args.rows} rows, {len(after) / 1024:.0f} KiB, identical output")
+    results = {}
+    for name, render in (("before", render_before), ("after", render_after)):
+        results[name] = await best_of(render, field, content, args.repeat)
+        print(f"{name:<8} {results[name] * 1000:8.1f} ms")
+    print(f"speedup  {results['before'] / results['after']:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
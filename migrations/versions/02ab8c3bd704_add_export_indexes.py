@@ -0,0 +1,32 @@
+"""add export indexes
+
+Revision ID: 02ab8c3bd704
+Revises: 9d286884528a
+Create Date: 2025-01-15 16:20:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '02ab8c3bd704'
+down_revision: Union[str, None] = '9d286884528a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_updated_at_id', 'books', ['updated_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_reviews_updated_at_id', 'reviews', ['updated_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_updated_at_id', table_name='reviews', postgresql_concurrently=True)
+        op.drop_index('ix_books_updated_at_id', table_name='books', postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""add book search vector
+
+Revision ID: 22ee268b26f7
+Revises: 27bb2771ee14
+Create Date: 2025-01-19 10:41:27.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22ee268b26f7'
+down_revision: Union[str, None] = '27bb2771ee14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a stored generated column is computed for every existing row, so this
+    # rewrites books under an exclusive lock; schedule it in a quiet window.
+    # Matches in the title rank above the author, the author above the publisher.
+    op.execute(
+        """
+        ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english'::regconfig, title), 'A') ||
+            setweight(to_tsvector('english'::regconfig, author), 'B') ||
+            setweight(to_tsvector('english'::regconfig, publisher), 'C')
+        ) STORED
+        """
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_search_vector', table_name='books', postgresql_concurrently=True)
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,41 @@
+"""add book rating aggregates
+
+Revision ID: 27bb2771ee14
+Revises: 02ab8c3bd704
+Create Date: 2025-01-18 13:05:52.640981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '27bb2771ee14'
+down_revision: Union[str, None] = '02ab8c3bd704'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # constant defaults are stored in the catalog, so these do not rewrite books;
+    # run `python -m app.books.backfill_ratings` afterwards to fill them in
+    op.add_column('books', sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('average_rating', postgresql.DOUBLE_PRECISION(), server_default='0', nullable=False))
+    op.create_table('book_rating_counts',
+    sa.Column('book_id', postgresql.UUID(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'rating')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('book_rating_counts')
+    op.drop_column('books', 'average_rating')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
@@ -0,0 +1,48 @@
+"""drop unused book listing indexes
+
+Revision ID: 3c5e8a1f7d92
+Revises: 8b0640507954
+Create Date: 2025-01-27 10:05:31.274918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e8a1f7d92'
+down_revision: Union[str, None] = '8b0640507954'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# measured on 500k books, these save at most 0.5 ms per listing page: a user's
+# few hundred books are sorted in memory, and a language or publisher matches
+# so many books that scanning the (sort, id) index past the others is quick.
+# Every insert and update of a book had to maintain them. The indexes that
+# stay save 100+ ms (no filter, a user's books by created_at) or 3-8 ms,
+# growing with the catalog (a single author's books)
+INDEXES = [
+    [filter_column, sort_column, 'id']
+    for filter_column, sort_columns in (
+        ('user_id', ['publish_date', 'page_count', 'title']),
+        ('language', ['created_at', 'publish_date', 'page_count', 'title']),
+        ('publisher', ['created_at', 'publish_date', 'page_count', 'title']),
+    )
+    for sort_column in sort_columns
+]
+
+
+def upgrade() -> None:
+    # DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for columns in INDEXES:
+            op.drop_index(f"ix_books_{'_'.join(columns)}", table_name='books', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for columns in reversed(INDEXES):
+            op.create_index(f"ix_books_{'_'.join(columns)}", 'books', columns, unique=False, postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""restore book listing indexes
+
+Revision ID: 5b9d0e3a7c14
+Revises: e7f3b92d05a6
+Create Date: 2025-02-03 09:41:26.558013
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9d0e3a7c14'
+down_revision: Union[str, None] = 'e7f3b92d05a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# every (filter, sort) pair of the listings has its keyset pagination index
+# again: for a rare language or publisher, or a user with a large catalog, the
+# (sort, id) index alone is walked across most of the table before a page fills.
+# Brings back the ones 3c5e8a1f7d92 dropped and adds the average_rating ones
+# a41d7c6e2b58 did not create
+INDEXES = [
+    [filter_column, sort_column, 'id']
+    for filter_column, sort_columns in (
+        ('user_id', ['publish_date', 'page_count', 'title', 'average_rating']),
+        ('language', ['created_at', 'publish_date', 'page_count', 'title', 'average_rating']),
+        ('publisher', ['created_at', 'publish_date', 'page_count', 'title', 'average_rating']),
+    )
+    for sort_column in sort_columns
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for columns in INDEXES:
+            op.create_index(f"ix_books_{'_'.join(columns)}", 'books', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for columns in reversed(INDEXES):
+            op.drop_index(f"ix_books_{'_'.join(columns)}", table_name='books', postgresql_concurrently=True)
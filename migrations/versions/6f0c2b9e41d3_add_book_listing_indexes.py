@@ -0,0 +1,43 @@
+"""add book listing indexes
+
+Revision ID: 6f0c2b9e41d3
+Revises: 22ee268b26f7
+Create Date: 2025-01-20 09:12:44.507318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f0c2b9e41d3'
+down_revision: Union[str, None] = '22ee268b26f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# one keyset pagination index per (filter, sort) pair of the listing endpoints;
+# ix_books_created_at_id and ix_books_user_id_created_at_id already exist
+FILTERS = [None, 'user_id', 'language', 'author', 'publisher']
+SORTS = ['created_at', 'publish_date', 'page_count', 'title']
+INDEXES = [
+    [column for column in (filter_column, sort_column, 'id') if column]
+    for filter_column in FILTERS
+    for sort_column in SORTS
+    if (filter_column, sort_column) not in ((None, 'created_at'), ('user_id', 'created_at'))
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for columns in INDEXES:
+            op.create_index(f"ix_books_{'_'.join(columns)}", 'books', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for columns in reversed(INDEXES):
+            op.drop_index(f"ix_books_{'_'.join(columns)}", table_name='books', postgresql_concurrently=True)
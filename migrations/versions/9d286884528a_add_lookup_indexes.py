@@ -0,0 +1,41 @@
+"""add lookup indexes
+
+Revision ID: 9d286884528a
+Revises: d5a80d1d52c7
+Create Date: 2025-01-12 11:47:03.518220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d286884528a'
+down_revision: Union[str, None] = 'd5a80d1d52c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# books.user_id and books.created_at are already covered by the leading
+# columns of the keyset pagination indexes added in d5a80d1d52c7
+INDEXES = [
+    ('ix_users_email', 'users', ['email']),
+    ('ix_reviews_book_id', 'reviews', ['book_id']),
+    ('ix_reviews_user_id', 'reviews', ['user_id']),
+    ('ix_reviews_created_at', 'reviews', ['created_at']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
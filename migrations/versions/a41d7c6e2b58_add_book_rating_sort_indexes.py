@@ -0,0 +1,39 @@
+"""add book rating sort indexes
+
+Revision ID: a41d7c6e2b58
+Revises: 3c5e8a1f7d92
+Create Date: 2025-01-28 16:40:12.803561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d7c6e2b58'
+down_revision: Union[str, None] = '3c5e8a1f7d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keyset pagination of the listings sorted by average_rating, unfiltered and
+# by author like the other sorts
+INDEXES = [
+    ['average_rating', 'id'],
+    ['author', 'average_rating', 'id'],
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for columns in INDEXES:
+            op.create_index(f"ix_books_{'_'.join(columns)}", 'books', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for columns in reversed(INDEXES):
+            op.drop_index(f"ix_books_{'_'.join(columns)}", table_name='books', postgresql_concurrently=True)
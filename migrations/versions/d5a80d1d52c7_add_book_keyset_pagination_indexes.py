@@ -0,0 +1,32 @@
+"""add book keyset pagination indexes
+
+Revision ID: d5a80d1d52c7
+Revises: 5490ea1d0851
+Create Date: 2025-01-10 18:12:41.306512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a80d1d52c7'
+down_revision: Union[str, None] = '5490ea1d0851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_created_at_id', 'books', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_books_user_id_created_at_id', 'books', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_user_id_created_at_id', table_name='books', postgresql_concurrently=True)
+        op.drop_index('ix_books_created_at_id', table_name='books', postgresql_concurrently=True)
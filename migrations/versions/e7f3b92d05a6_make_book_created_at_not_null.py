@@ -0,0 +1,38 @@
+"""make book created_at not null
+
+Revision ID: e7f3b92d05a6
+Revises: a41d7c6e2b58
+Create Date: 2025-01-29 11:22:48.190734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3b92d05a6'
+down_revision: Union[str, None] = 'a41d7c6e2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # rows written without the ORM default; the last update is the closest
+    # known time they existed by
+    op.execute("UPDATE books SET created_at = coalesce(updated_at, now()) WHERE created_at IS NULL")
+    # SET NOT NULL alone scans the table under an exclusive lock; a validated
+    # CHECK constraint lets Postgres skip that scan, and validating it only
+    # blocks schema changes, not reads or writes. Each step commits on its own
+    # so that the brief exclusive locks are not held across the validation
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE books ADD CONSTRAINT books_created_at_not_null CHECK (created_at IS NOT NULL) NOT VALID")
+        op.execute("ALTER TABLE books VALIDATE CONSTRAINT books_created_at_not_null")
+        op.alter_column('books', 'created_at', existing_type=postgresql.TIMESTAMP(), nullable=False)
+        op.drop_constraint('books_created_at_not_null', 'books', type_='check')
+
+
+def downgrade() -> None:
+    op.alter_column('books', 'created_at', existing_type=postgresql.TIMESTAMP(), nullable=True)
@@ -0,0 +1,20 @@
+import os
+
+# app.config reads these when the app is imported; a real deployment sets them
+# in app/.env. Tests that need the database skip themselves unless
+# DATABASE_URL is set to a test database (see test_query_plans.py), so the
+# default does not name one
+for name, value in {
+    "DATABASE_URL": "postgresql+asyncpg://postgres@localhost/bookhub",
+    "JWT_SECRET": "test-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRY": "3600",
+    "MAIL_USERNAME": "bookhub",
+    "MAIL_FROM_EMAIL": "noreply@bookhub.test",
+    "MAIL_FROM_NAME": "BookHub",
+    "MAIL_PASSWORD": "password",
+    "MAIL_PORT": "25",
+    "MAIL_SERVER": "localhost",
+    "DOMAIN": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
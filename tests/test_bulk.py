@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.books import service as service_module
+from app.books.bulk import LINE_TOO_LONG, iter_lines, iter_records
+from app.books.service import BookService
+
+BOOK = {
+    "title": "Dune",
+    "author": "Frank Herbert",
+    "publisher": "Chilton",
+    "publish_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+CSV_HEADER = b"title,author,publisher,publish_date,page_count,language\n"
+CSV_ROW = b"Dune,Frank Herbert,Chilton,1965-08-01,412,en\n"
+
+
+async def as_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def lines(chunks, max_length=100) -> list:
+    return asyncio.run(collect(iter_lines(as_stream(chunks), max_length)))
+
+
+def records(body: bytes, content_type: str, chunk_size=7, max_length=1000) -> list:
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    return asyncio.run(
+        collect(iter_records(as_stream(chunks), content_type, max_length))
+    )
+
+
+def test_lines_across_chunks():
+    assert lines([b"ab", b"c\nde", b"\n\nf", b"g"]) == [b"abc", b"de", b"", b"fg"]
+
+
+def test_lines_trailing_newline():
+    assert lines([b"ab\n", b"cd\n"]) == [b"ab", b"cd"]
+
+
+def test_too_long_lines_are_dropped():
+    assert lines([b"12345", b"678\nok\n12345678"], max_length=5) == [
+        None,
+        b"ok",
+        None,
+    ]
+    # exactly max_length is fine, in one chunk or split across several
+    assert lines([b"12345\n", b"123", b"45\n"], max_length=5) == [b"12345", b"12345"]
+
+
+def test_ndjson_records():
+    body = b"\n".join(
+        [
+            json.dumps(BOOK).encode(),
+            b"",
+            b"{not json",
+            b"[1, 2]",
+            b'{"title": "' + b"x" * 2000 + b'"}',
+            json.dumps(BOOK).encode(),
+        ]
+    )
+    parsed = records(body, "application/x-ndjson; charset=utf-8")
+
+    assert [row for row, _ in parsed] == [1, 3, 4, 5, 6]
+    assert parsed[0] == (1, BOOK)
+    assert parsed[1][1].startswith("invalid JSON")
+    assert parsed[2][1] == "expected a JSON object"
+    assert parsed[3][1] == LINE_TOO_LONG
+    assert parsed[4] == (6, BOOK)
+
+
+def test_csv_records():
+    body = CSV_HEADER + CSV_ROW + b'"Dune, Messiah",Frank,Putnam\r\n\n' + CSV_ROW
+    parsed = records(body, "text/csv")
+
+    expected = {key: str(value) for key, value in BOOK.items()}
+    assert parsed == [(2, expected), (3, "expected 6 columns, got 3"), (5, expected)]
+
+
+def test_unsupported_content_type():
+    assert iter_records(as_stream([]), "application/json", 1000) is None
+
+
+class FakeSession:
+    def __init__(self, fail_batches=()):
+        self.batches = []
+        self.fail_batches = fail_batches
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def exec(self, statement, params):
+        self.batches.append([values["title"] for values in params])
+        if len(self.batches) in self.fail_batches:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(autouse=True)
+def no_suggestion_updates(monkeypatch):
+    async def publish_book_changes(**changes):
+        pass
+
+    monkeypatch.setattr(service_module, "publish_book_changes", publish_book_changes)
+
+
+def bulk_create(rows, session, batch_size=2, max_errors=10) -> dict:
+    async def stream():
+        for row in rows:
+            yield row
+
+    return asyncio.run(
+        BookService().bulk_create_books(
+            stream(), "user-1", session, batch_size=batch_size, max_errors=max_errors
+        )
+    )
+
+
+def book(title: str) -> dict:
+    return dict(BOOK, title=title)
+
+
+def test_bulk_create_inserts_in_batches():
+    session = FakeSession()
+    rows = [(i, book(f"b{i}")) for i in range(1, 6)]
+    report = bulk_create(rows, session)
+
+    assert session.batches == [["b1", "b2"], ["b3", "b4"], ["b5"]]
+    assert session.commits == 3
+    assert report == {
+        "inserted": 5,
+        "failed": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+
+
+def test_bulk_create_reports_invalid_rows():
+    session = FakeSession()
+    rows = [
+        (1, book("b1")),
+        (2, "invalid JSON"),
+        (3, dict(BOOK, page_count="many")),
+        (4, dict(BOOK, publish_date="someday")),
+        (5, book("b5")),
+    ]
+    report = bulk_create(rows, session)
+
+    assert session.batches == [["b1", "b5"]]
+    assert report["inserted"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["errors"][0].startswith("page_count:")
+    assert report["errors"][2]["errors"][0].startswith("publish_date:")
+
+
+def test_bulk_create_failed_batch_does_not_stop_the_import():
+    session = FakeSession(fail_batches={1})
+    rows = [(i, book(f"b{i}")) for i in range(1, 5)]
+    report = bulk_create(rows, session, max_errors=1)
+
+    assert session.rollbacks == 1
+    assert report["inserted"] == 2
+    assert report["failed"] == 2
+    assert report["errors"] == [
+        {"row": 1, "errors": ["database error: OperationalError"]}
+    ]
+    assert report["errors_truncated"]
@@ -0,0 +1,45 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.books.schemas import BookSortField
+from app.books.service import SORT_VALUE_TYPES
+from app.books.utils import decode_cursor, encode_cursor
+from app.errors import InvalidCursor
+
+BOOK_ID = uuid.uuid4()
+SORT_VALUES = {
+    BookSortField.created_at: datetime(2024, 5, 1, 12, 30, 15, 123456),
+    BookSortField.publish_date: datetime(1965, 8, 1),
+    BookSortField.page_count: 412,
+    BookSortField.title: "Dune",
+    BookSortField.average_rating: 3.3333333333333335,
+}
+
+
+def test_every_sort_field_has_a_value_type():
+    assert set(SORT_VALUE_TYPES) == set(BookSortField)
+
+
+@pytest.mark.parametrize("sort_by", list(BookSortField))
+def test_cursor_round_trip(sort_by):
+    sort_key = f"{sort_by.value}:desc"
+    cursor = encode_cursor(sort_key, SORT_VALUES[sort_by], BOOK_ID)
+
+    value, book_id = decode_cursor(cursor, sort_key, SORT_VALUE_TYPES[sort_by])
+    assert value == SORT_VALUES[sort_by]
+    assert book_id == BOOK_ID
+
+
+def test_cursor_of_another_ordering_is_rejected():
+    cursor = encode_cursor("average_rating:desc", 4.0, BOOK_ID)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "average_rating:asc", float)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "average_rating:desc", str)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor", "title:asc", str)
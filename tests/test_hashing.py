@@ -0,0 +1,22 @@
+import asyncio
+import threading
+
+from app.auth.hashing import PasswordHasher
+
+
+def test_cancelled_caller_keeps_running_hash_pending():
+    async def scenario():
+        hasher = PasswordHasher(workers=1, max_queue=0)
+        release = threading.Event()
+        task = asyncio.create_task(hasher.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        pending_after_cancel = hasher.stats.pending
+
+        release.set()
+        await asyncio.sleep(0.05)
+        return pending_after_cancel, hasher.stats.pending
+
+    assert asyncio.run(scenario()) == (1, 0)
@@ -0,0 +1,138 @@
+import smtplib
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.celery import is_permanent_failure
+from app.mail import SMTPSender, create_email_message
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        # one entry per SMTP connection: the client's (host, port)
+        self.connections = set()
+        self.last_server = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.rcpt_tos)
+        self.connections.add(session.peer)
+        self.last_server = server
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def make_sender(controller, **kwargs) -> SMTPSender:
+    return SMTPSender(
+        host=controller.hostname,
+        port=controller.port,
+        username="",
+        password="",
+        starttls=False,
+        use_credentials=False,
+        timeout=5,
+        **kwargs,
+    )
+
+
+def message(i: int):
+    return create_email_message([f"user{i}@example.com"], f"subject {i}", "<p>hi</p>")
+
+
+def test_messages_reuse_one_connection(smtp_server):
+    sender = make_sender(smtp_server)
+    for i in range(5):
+        sender.send(message(i))
+    sender.close()
+
+    handler = smtp_server.handler
+    assert handler.messages == [[f"user{i}@example.com"] for i in range(5)]
+    assert len(handler.connections) == 1
+
+
+def test_connection_replaced_after_max_messages(smtp_server):
+    sender = make_sender(smtp_server, max_messages=2)
+    for i in range(5):
+        sender.send(message(i))
+    sender.close()
+
+    assert len(smtp_server.handler.messages) == 5
+    assert len(smtp_server.handler.connections) == 3
+
+
+def test_connection_replaced_when_idle(smtp_server):
+    sender = make_sender(smtp_server, idle_timeout=0)
+    sender.send(message(1))
+    time.sleep(0.01)
+    sender.send(message(2))
+    sender.close()
+
+    assert len(smtp_server.handler.connections) == 2
+
+
+def test_sending_is_paced(smtp_server):
+    sender = make_sender(smtp_server, rate=20)
+    start = time.monotonic()
+    for i in range(5):
+        sender.send(message(i))
+    elapsed = time.monotonic() - start
+    sender.close()
+
+    # the first message goes out at once, the other four 1/20 s apart
+    assert elapsed >= 4 / 20 - 0.01
+    assert len(smtp_server.handler.messages) == 5
+
+
+def test_reconnects_after_the_server_drops_the_connection(smtp_server):
+    sender = make_sender(smtp_server)
+    sender.send(message(1))
+
+    # the server hangs up on the pooled connection, as after its idle timeout
+    transport = smtp_server.handler.last_server.transport
+    smtp_server.loop.call_soon_threadsafe(transport.close)
+    time.sleep(0.1)
+    sender.send(message(2))
+    sender.close()
+
+    handler = smtp_server.handler
+    assert handler.messages == [["user1@example.com"], ["user2@example.com"]]
+    assert len(handler.connections) == 2
+
+
+def refused(*codes: int) -> smtplib.SMTPRecipientsRefused:
+    return smtplib.SMTPRecipientsRefused(
+        {f"user{i}@example.com": (code, b"refused") for i, code in enumerate(codes)}
+    )
+
+
+@pytest.mark.parametrize(
+    "error, permanent",
+    [
+        (refused(550), True),
+        (refused(550, 553), True),
+        (refused(450), False),
+        (refused(550, 452), False),
+        (smtplib.SMTPDataError(554, b"rejected"), True),
+        (smtplib.SMTPDataError(451, b"try again later"), False),
+        (smtplib.SMTPServerDisconnected(), False),
+        (ConnectionRefusedError(), False),
+    ],
+)
+def test_is_permanent_failure(error, permanent):
+    assert is_permanent_failure(error) is permanent
@@ -0,0 +1,132 @@
+"""EXPLAIN checks that the hot lookups keep using their indexes.
+
+They need a Postgres migrated to head (alembic upgrade head) and only run when
+DATABASE_URL names a test database, e.g. .../bookhub_test: the rows they seed
+are rolled back, but the statistics collected by ANALYZE stay behind.
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import Config
+
+pytestmark = pytest.mark.skipif(
+    "test" not in (make_url(Config.DATABASE_URL).database or ""),
+    reason="DATABASE_URL does not point at a test database",
+)
+
+USERS = 2000
+BOOKS = 20000
+# a user with a few books is a bitmap scan and sort on any user_id index, so
+# the books belong to few users, which makes the listing order matter
+AUTHORS = 50
+REVIEWS = 40000
+
+SEED = [
+    f"""
+    INSERT INTO users (id, username, email, first_name, last_name,
+                       is_verified, password_hash, created_at, updated_at)
+    SELECT md5('user' || i)::uuid, 'user' || i, 'user' || i || '@plans.test',
+           'First', 'Last', true, 'x', now(), now()
+    FROM generate_series(1, {USERS}) AS i
+    """,
+    f"""
+    INSERT INTO books (id, title, author, publisher, publish_date, page_count,
+                       language, user_id, created_at, updated_at)
+    SELECT md5('book' || i)::uuid, 'Book ' || i, 'Author ' || i % 500,
+           'Publisher ' || i % 50, now() - i * interval '1 day', 100 + i % 800,
+           'en', md5('user' || (i % {AUTHORS} + 1))::uuid,
+           now() - i * interval '1 minute', now()
+    FROM generate_series(1, {BOOKS}) AS i
+    """,
+    f"""
+    INSERT INTO reviews (review_text, rating, book_id, user_id,
+                         created_at, updated_at)
+    SELECT 'Review ' || i, i % 5,
+           md5('book' || (i % {BOOKS} + 1))::uuid,
+           md5('user' || (i % {USERS} + 1))::uuid, now(), now()
+    FROM generate_series(1, {REVIEWS}) AS i
+    """,
+    "ANALYZE users, books, reviews",
+]
+
+USER_ID = "md5('user7')::uuid"
+BOOK_ID = "md5('book7')::uuid"
+
+# the statements behind login, the book and user pages and the listings, with
+# the index each one has to use
+PLANS = {
+    "user by email": (
+        "SELECT * FROM users WHERE email = 'user7@plans.test'",
+        "ix_users_email",
+    ),
+    "reviews of a book": (
+        f"SELECT * FROM reviews WHERE book_id = {BOOK_ID}",
+        "ix_reviews_book_id",
+    ),
+    "reviews by a user": (
+        f"SELECT * FROM reviews WHERE user_id = {USER_ID}",
+        "ix_reviews_user_id",
+    ),
+    "books of a user": (
+        f"SELECT * FROM books WHERE user_id = {USER_ID} "
+        "ORDER BY created_at DESC, id DESC LIMIT 21",
+        "ix_books_user_id_created_at_id",
+    ),
+    "newest books": (
+        "SELECT * FROM books ORDER BY created_at DESC, id DESC LIMIT 21",
+        "ix_books_created_at_id",
+    ),
+    "books of a publisher by title": (
+        "SELECT * FROM books WHERE publisher = 'Publisher 7' "
+        "ORDER BY title DESC, id DESC LIMIT 21",
+        "ix_books_publisher_title_id",
+    ),
+    "top rated books": (
+        "SELECT * FROM books ORDER BY average_rating DESC, id DESC LIMIT 21",
+        "ix_books_average_rating_id",
+    ),
+}
+
+
+def scans(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+async def explain_all() -> dict:
+    engine = create_async_engine(Config.DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            for statement in SEED:
+                await conn.execute(text(statement))
+            plans = {}
+            for name, (statement, _) in PLANS.items():
+                result = await conn.scalar(text(f"EXPLAIN (FORMAT JSON) {statement}"))
+                if isinstance(result, str):
+                    result = json.loads(result)
+                plans[name] = list(scans(result[0]["Plan"]))
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return asyncio.run(explain_all())
+
+
+@pytest.mark.parametrize("name", PLANS)
+def test_lookup_uses_index(plans, name):
+    nodes = plans[name]
+    index = PLANS[name][1]
+    assert not [n for n in nodes if n["Node Type"] == "Seq Scan"], nodes
+    assert index in [n.get("Index Name") for n in nodes], nodes
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.config import Config
+from app.database import replicas as replicas_module
+from app.database.main import async_session_maker
+from app.database.replicas import (
+    RecentWriters,
+    Replica,
+    ReplicaSet,
+    read_session_maker,
+)
+
+REPLICA_URL = "postgresql+asyncpg://postgres@replica.invalid/bookhub"
+
+
+def make_replica_set(count: int) -> ReplicaSet:
+    # the engines connect lazily, so nothing has to listen at REPLICA_URL
+    return ReplicaSet([REPLICA_URL] * count)
+
+
+def set_lag(replica: Replica, lag) -> None:
+    async def replication_lag():
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+    replica._replication_lag = replication_lag
+
+
+@pytest.fixture
+def synced_writers(monkeypatch):
+    writers = RecentWriters()
+    writers.subscribed_at = time.monotonic() - Config.READ_YOUR_WRITES_WINDOW
+    monkeypatch.setattr(replicas_module, "recent_writers", writers)
+    return writers
+
+
+def test_recent_writers_not_synced_until_subscribed_for_a_window(monkeypatch):
+    monkeypatch.setattr(Config, "READ_YOUR_WRITES_WINDOW", 5)
+    writers = RecentWriters()
+    assert not writers.synced
+
+    writers.subscribed_at = time.monotonic()
+    assert not writers.synced
+
+    writers.subscribed_at = time.monotonic() - 5
+    assert writers.synced
+
+
+def test_recent_writers_forget_users_after_the_window(monkeypatch):
+    monkeypatch.setattr(Config, "READ_YOUR_WRITES_WINDOW", 0.05)
+    writers = RecentWriters()
+    writers.add("user-1")
+    assert "user-1" in writers
+    assert "user-2" not in writers
+
+    time.sleep(0.1)
+    assert "user-1" not in writers
+
+
+def test_choose_round_robins_over_healthy_replicas():
+    replica_set = make_replica_set(3)
+    first, second, third = replica_set.replicas
+    first.healthy = third.healthy = True
+
+    chosen = [replica_set.choose() for _ in range(4)]
+    assert chosen == [first, third, first, third]
+
+
+def test_choose_without_healthy_replicas():
+    replica_set = make_replica_set(2)
+    assert replica_set.choose() is None
+
+
+def test_check_ejects_lagging_replica_and_takes_it_back(monkeypatch):
+    monkeypatch.setattr(Config, "REPLICA_MAX_LAG", 10)
+    replica = make_replica_set(1).replicas[0]
+
+    set_lag(replica, 0.5)
+    asyncio.run(replica.check())
+    assert replica.healthy and replica.lag == 0.5
+
+    set_lag(replica, 30.0)
+    asyncio.run(replica.check())
+    assert not replica.healthy
+
+    set_lag(replica, 0.0)
+    asyncio.run(replica.check())
+    assert replica.healthy
+
+
+def test_check_ejects_unreachable_replica():
+    replica = make_replica_set(1).replicas[0]
+    replica.healthy = True
+
+    set_lag(replica, OperationalError("SELECT 1", {}, ConnectionRefusedError()))
+    asyncio.run(replica.check())
+    assert not replica.healthy
+
+
+def test_check_times_out_hanging_replica(monkeypatch):
+    monkeypatch.setattr(Config, "REPLICA_HEALTH_CHECK_INTERVAL", 0.05)
+    replica = make_replica_set(1).replicas[0]
+    replica.healthy = True
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    replica._replication_lag = hang
+    asyncio.run(replica.check())
+    assert not replica.healthy
+
+
+def test_reads_go_to_a_healthy_replica(monkeypatch, synced_writers):
+    replica_set = make_replica_set(1)
+    replica_set.replicas[0].healthy = True
+    monkeypatch.setattr(replicas_module, "replicas", replica_set)
+
+    assert read_session_maker("user-1") is replica_set.replicas[0].session_maker
+
+
+def test_reads_fall_back_to_primary(monkeypatch, synced_writers):
+    replica_set = make_replica_set(1)
+    monkeypatch.setattr(replicas_module, "replicas", replica_set)
+
+    # no replica in rotation
+    assert read_session_maker("user-1") is async_session_maker
+
+    # the user wrote recently
+    replica_set.replicas[0].healthy = True
+    synced_writers.add("user-1")
+    assert read_session_maker("user-1") is async_session_maker
+    assert read_session_maker("user-2") is replica_set.replicas[0].session_maker
+
+    # this worker may have missed other workers' writes
+    synced_writers.subscribed_at = None
+    assert read_session_maker("user-2") is async_session_maker
+
+
+def test_reads_use_primary_without_replicas(monkeypatch, synced_writers):
+    monkeypatch.setattr(replicas_module, "replicas", make_replica_set(0))
+    assert read_session_maker("user-1") is async_session_maker
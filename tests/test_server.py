@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from app.config import Config
+from app.server import pool_sizing, prepare_multiproc_dir
+
+
+@pytest.fixture(autouse=True)
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(Config, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(Config, "DB_MAX_OVERFLOW", 10)
+
+
+def test_pool_sizing_without_limit():
+    assert pool_sizing(8, None) == (5, 10)
+
+
+def test_pool_sizing_cuts_overflow_first():
+    assert pool_sizing(4, 40) == (5, 5)
+
+
+def test_pool_sizing_cuts_pool_size():
+    assert pool_sizing(8, 24) == (3, 0)
+
+
+def test_pool_sizing_rejects_budget_below_one_per_worker():
+    with pytest.raises(ValueError):
+        pool_sizing(8, 7)
+
+
+def test_multiproc_dir_not_needed_for_one_worker(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    assert prepare_multiproc_dir(1) is None
+    assert "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+
+
+def test_multiproc_dir_created_for_several_workers(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    path = prepare_multiproc_dir(4)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == path
+    assert os.listdir(path) == []
+
+
+def test_multiproc_dir_cleared(monkeypatch, tmp_path):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert prepare_multiproc_dir(4) == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []